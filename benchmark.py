@@ -0,0 +1,627 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import socketserver
+import importlib.util
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+from unittest import mock
+from email import message_from_bytes
+from email.message import EmailMessage
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, 'benchmark_baseline.json')
+SHEET_COLUMNS = ['School Name', 'Last Name', 'Email', 'CC', 'Status', 'succcessful/Failed',
+                 'Date of Last Action', 'Next Action Due Date', 'Next action']
+
+# Static single-page fake Gmail built from the selectors test.py relies on
+FAKE_GMAIL_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Fake Gmail</title>
+<style>
+body { font-family: sans-serif; margin: 0; }
+tr.zA { cursor: pointer; }
+[role=button], button { display: inline-block; padding: 4px 8px; margin: 4px; border: 1px solid #999; cursor: pointer; }
+.compose, [role=dialog], [role=menu] { border: 1px solid #333; padding: 8px; margin: 8px; background: #fff; }
+div[contenteditable] { min-height: 80px; border: 1px solid #ccc; }
+</style></head>
+<body>
+<div class="nH">
+  <div gh="tl"><input type="text" aria-label="Search mail" placeholder="Search mail" id="search"></div>
+  <div data-tooltip="Compose">Compose</div>
+  <div role="main" id="main"><div id="list"></div><div id="thread" style="display: none"></div></div>
+  <div id="overlay"></div>
+</div>
+<script>
+var list = document.getElementById('list'), threadView = document.getElementById('thread');
+var overlay = document.getElementById('overlay');
+// Like Gmail, the search list stays in the DOM (hidden) while a thread is shown
+function show(view) {
+  list.style.display = view === list ? '' : 'none';
+  threadView.style.display = view === threadView ? '' : 'none';
+}
+function esc(t) { var d = document.createElement('div'); d.textContent = t; return d.innerHTML; }
+function get(url, done) { fetch(url).then(function (r) { return r.json(); }).then(done); }
+function post(url, data) {
+  fetch(url, {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(data)});
+}
+function renderSearch(query) {
+  list.innerHTML = '';
+  show(list);
+  get('/api/search?q=' + encodeURIComponent(query), function (rows) {
+    if (!rows.length) { list.innerHTML = '<table><tr><td class="TC">No messages matched your search.</td></tr></table>'; return; }
+    var html = '<table>';
+    rows.forEach(function (row) {
+      html += '<tr class="zA" jsaction="click" data-id="' + row.id + '">' +
+        '<td class="yW"><span class="yP" email="' + esc(row.sender_email) + '" name="' + esc(row.sender) + '">' + esc(row.sender) + '</span></td>' +
+        '<td class="y6"><span class="bog" data-legacy-thread-id="' + row.id + '">' + esc(row.subject) + '</span>' +
+        '<span class="y2"> - ' + esc(row.snippet) + '</span></td></tr>';
+    });
+    list.innerHTML = html + '</table>';
+    list.querySelectorAll('tr.zA').forEach(function (tr) {
+      tr.addEventListener('click', function () { location.hash = '#all/' + tr.getAttribute('data-id'); });
+    });
+  });
+}
+function renderThread(id) {
+  // Like Gmail, the previous conversation stays in the DOM until the new one has loaded
+  get('/api/thread/' + encodeURIComponent(id), function (thread) {
+    if (decodeURIComponent(location.hash.slice(1)) !== 'all/' + id) { return; }  // Navigated away meanwhile
+    if (!thread.id) {
+      threadView.innerHTML = '<table><tr><td class="TC">Conversation not found.</td></tr></table>';
+      show(threadView);
+      return;
+    }
+    // Gmail carries the thread ids on the conversation header, the same attribute as the list rows
+    var html = '<h2 class="hP" data-legacy-thread-id="' + thread.id + '">' + esc(thread.subject) + '</h2><div>';
+    thread.messages.forEach(function (m) {
+      html += '<div class="adn"><span class="gD" email="' + esc(m.email) + '" name="' + esc(m.name) + '">' + esc(m.name) + '</span>' +
+        '<div class="a3s ii gt">' + esc(m.body) + '</div></div>';
+    });
+    html += '</div><div role="button" aria-label="Reply" data-tooltip="Reply" id="reply">Reply</div>';
+    threadView.innerHTML = html;
+    show(threadView);
+    document.getElementById('reply').addEventListener('click', function () { openCompose(thread.id); });
+  });
+}
+function closeCompose(threadId, mode, extra) {
+  var body = document.querySelector("div[aria-label='Message Body']");
+  post('/api/sent', {thread: threadId, mode: mode, body: body ? body.innerText : '', extra: extra || {}});
+  overlay.innerHTML = '';
+}
+function openCompose(threadId) {
+  overlay.innerHTML = '<div class="compose">' +
+    '<div contenteditable="true" role="textbox" aria-label="Message Body" class="Am Al editable"></div>' +
+    '<div role="button" aria-label="Send (Ctrl-Enter)" data-tooltip="Send" id="send">Send</div>' +
+    '<div role="button" aria-label="More send options" data-tooltip="More send options" id="more">More</div></div>';
+  document.getElementById('send').addEventListener('click', function () { closeCompose(threadId, 'send'); });
+  document.getElementById('more').addEventListener('click', function () {
+    var menu = document.createElement('div');
+    menu.setAttribute('role', 'menu');
+    menu.innerHTML = '<div role="menuitem" id="schedule-item">Schedule send</div>';
+    overlay.appendChild(menu);
+    document.getElementById('schedule-item').addEventListener('click', function () {
+      menu.remove();
+      openScheduleDialog(threadId);
+    });
+  });
+}
+function openScheduleDialog(threadId) {
+  var dialog = document.createElement('div');
+  dialog.setAttribute('role', 'dialog');
+  dialog.innerHTML = '<div role="button" id="pick">Pick date &amp; time</div>';
+  overlay.appendChild(dialog);
+  document.getElementById('pick').addEventListener('click', function () {
+    var now = new Date();
+    dialog.innerHTML = '<input type="text" aria-label="Date" value="' + now.toDateString().slice(4) + '">' +
+      '<input type="text" aria-label="Time" value="8:00 AM">' +
+      '<button id="confirm">Schedule send</button>';
+    document.getElementById('confirm').addEventListener('click', function () {
+      var inputs = dialog.querySelectorAll('input');
+      closeCompose(threadId, 'schedule', {date: inputs[0].value, time: inputs[1].value});
+    });
+  });
+}
+function route() {
+  var hash = decodeURIComponent(location.hash.slice(1));
+  overlay.innerHTML = '';
+  if (hash.indexOf('search/') === 0) { renderSearch(hash.slice(7).replace(/\\+/g, ' ')); }
+  else if (hash.indexOf('all/') === 0) { renderThread(hash.slice(4)); }
+  else { list.innerHTML = '<table><tr class="zA"><td>Inbox</td></tr></table>'; show(list); }
+}
+document.getElementById('search').addEventListener('keydown', function (e) {
+  if (e.key === 'Enter') { location.hash = '#search/' + encodeURIComponent(this.value); }
+});
+window.addEventListener('hashchange', route);
+route();
+</script></body></html>
+"""
+
+class FakeGmail:
+    """Threads for every school in a generated sheet: two decoys plus one thread naming its directors"""
+    def __init__(self, contacts, latency=0.05):
+        self.latency = latency
+        self.threads = {}
+        self.by_school = {}
+        self.sent = []
+        self.searches = 0
+        self._lock = threading.Lock()
+        for school, last_name, *_ in contacts:
+            key = school.lower()
+            if key not in self.by_school:
+                self.by_school[key] = []
+                for n in range(2):
+                    self._add_thread(key, school, f"Newsletter {n + 1} - {school}",
+                                     [('Office', 'office@example.org', f"General update for {school}.")])
+                self._add_thread(key, school, f"Music program follow-up - {school}",
+                                 [('Office', 'office@example.org', f"Forwarding to the directors of {school}.")])
+            thread = self.threads[self.by_school[key][-1]]
+            thread['messages'].append((last_name, f"{last_name.lower()}@example.org",
+                                       f"Thanks for reaching out, this is {last_name} at {school}."))
+
+    def _add_thread(self, key, school, subject, messages):
+        thread_id = f"{len(self.threads):x}"
+        self.threads[thread_id] = {'id': thread_id, 'school': school, 'subject': subject, 'messages': list(messages)}
+        self.by_school[key].append(thread_id)
+
+    def search(self, query):
+        with self._lock:
+            self.searches += 1
+        query = query.lower().strip()
+        rows = []
+        for school_key, thread_ids in self.by_school.items():
+            if query in school_key:
+                for thread_id in reversed(thread_ids):
+                    thread = self.threads[thread_id]
+                    name, email, body = thread['messages'][0]
+                    rows.append({'id': thread_id, 'sender': name, 'sender_email': email,
+                                 'subject': thread['subject'], 'snippet': body[:80]})
+        return rows[:50]
+
+    def thread(self, thread_id):
+        thread = self.threads.get(thread_id)
+        if not thread:
+            return {}
+        return {'id': thread['id'], 'subject': thread['subject'],
+                'messages': [{'name': n, 'email': e, 'body': b} for n, e, b in thread['messages']]}
+
+    def record_sent(self, payload):
+        with self._lock:
+            self.sent.append(payload)
+
+    def misrouted(self, sent):
+        """Replies whose thread does not name the director they greet (the body starts 'Hi Director <name>,')"""
+        wrong = []
+        for payload in sent:
+            match = re.search(r'Hi Director (\S+?),', payload.get('body', ''))
+            thread = self.threads.get(payload.get('thread'))
+            names = {name for name, _, _ in thread['messages']} if thread else set()
+            if not match or match.group(1) not in names:
+                wrong.append({'thread': payload.get('thread'), 'director': match.group(1) if match else None})
+        return wrong
+
+    def serve(self):
+        """Start the HTTP server on a free local port; returns (server, base_url)"""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type='application/json'):
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/api/search':
+                    time.sleep(fake.latency)
+                    self._send(json.dumps(fake.search(parse_qs(url.query).get('q', [''])[0])))
+                elif url.path.startswith('/api/thread/'):
+                    time.sleep(fake.latency)
+                    self._send(json.dumps(fake.thread(unquote(url.path.rsplit('/', 1)[-1]))))
+                else:
+                    self._send(FAKE_GMAIL_PAGE, 'text/html; charset=utf-8')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    fake.record_sent(json.loads(self.rfile.read(length) or b'{}'))
+                except ValueError:
+                    pass
+                self._send('{}')
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+class LocalMailServer:
+    """Plain-text IMAP4 + SMTP stand-in with a fixed mailbox, enough for ImapSmtpTransport"""
+    def __init__(self, messages):
+        self.messages = [message.as_bytes() for message in messages]  # UID n is messages[n - 1]
+        self.received = []
+        self._servers = []
+
+    def imap_handler(self):
+        mail = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, text):
+                self.wfile.write(text.encode('utf-8') + b"\r\n")
+
+            def handle(self):
+                self.reply("* OK IMAP4rev1 stand-in ready")
+                for line in self.rfile:
+                    tag, _, rest = line.decode('utf-8').strip().partition(' ')
+                    command, _, args = rest.partition(' ')
+                    command = command.upper()
+                    if command == 'UID':
+                        command, _, args = args.partition(' ')
+                        command = 'UID ' + command.upper()
+                    if command == 'CAPABILITY':
+                        self.reply("* CAPABILITY IMAP4rev1 ENABLE UTF8=ACCEPT")
+                    elif command == 'ENABLE':
+                        self.reply("* ENABLED UTF8=ACCEPT")
+                    elif command in ('SELECT', 'EXAMINE'):
+                        self.reply(f"* {len(mail.messages)} EXISTS")
+                    elif command == 'UID SEARCH':
+                        needle = args.rsplit(' ', 1)[-1].strip('"').lower().encode('utf-8')
+                        uids = [str(uid) for uid, raw in enumerate(mail.messages, 1) if needle in raw.lower()]
+                        self.reply("* SEARCH " + " ".join(uids))
+                    elif command == 'UID FETCH':
+                        for uid in args.split(' ', 1)[0].split(','):
+                            header = mail.messages[int(uid) - 1].split(b"\n\n", 1)[0] + b"\n\n"
+                            self.wfile.write(f"* {uid} FETCH (UID {uid} BODY[HEADER] {{{len(header)}}}\r\n".encode('utf-8'))
+                            self.wfile.write(header + b")\r\n")
+                    elif command == 'LOGOUT':
+                        self.reply("* BYE")
+                        self.reply(f"{tag} OK LOGOUT completed")
+                        return
+                    elif command not in ('LOGIN', 'NOOP'):
+                        self.reply(f"{tag} BAD unsupported")
+                        continue
+                    self.reply(f"{tag} OK {command} completed")
+        return Handler
+
+    def smtp_handler(self):
+        mail = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, text):
+                self.wfile.write(text.encode('utf-8') + b"\r\n")
+
+            def handle(self):
+                self.reply("220 stand-in ESMTP")
+                for line in self.rfile:
+                    command = line.decode('utf-8').strip().split(' ', 1)[0].upper()
+                    if command in ('EHLO', 'HELO'):
+                        self.reply("250 localhost")
+                    elif command == 'DATA':
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        for data_line in self.rfile:
+                            if data_line == b".\r\n":
+                                break
+                            data.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                        mail.received.append(message_from_bytes(b"".join(data)))
+                        self.reply("250 OK queued")
+                    elif command == 'QUIT':
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("250 OK")
+        return Handler
+
+    def serve(self):
+        """Start both servers on free local ports; returns (imap_port, smtp_port)"""
+        ports = []
+        for handler in (self.imap_handler(), self.smtp_handler()):
+            server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self._servers.append(server)
+            ports.append(server.server_address[1])
+        return tuple(ports)
+
+    def shutdown(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+def mail_message(sender, to, subject, body, message_id):
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = to
+    message['Subject'] = subject
+    message['Message-ID'] = message_id
+    message.set_content(body)
+    return message
+
+def run_transport_check(automation):
+    """Find a director's thread and reply to it through ImapSmtpTransport against LocalMailServer"""
+    school, director = "Benchmark School 00000", "Director000001"
+    accented_school, accented_director = "École Saint-Jean", "Lefèvre"
+    mail = LocalMailServer([
+        mail_message("Office <office@example.org>", "me@example.org", f"Newsletter - {school}",
+                     f"General update for {school}.", "<news@example.org>"),
+        mail_message(f"{director} <{director.lower()}@example.org>", "me@example.org",
+                     f"Music program follow-up - {school}", f"This is {director} at {school}.", "<thread@example.org>"),
+        mail_message("Office <office@example.org>", "me@example.org", "Benchmark School 00001",
+                     "Another school.", "<other@example.org>"),
+        mail_message(f"{accented_director} <lefevre@example.org>", "me@example.org",
+                     f"Suivi - {accented_school}", f"Bonjour de {accented_school}.", "<accent@example.org>")
+    ])
+    imap_port, smtp_port = mail.serve()
+    started = time.perf_counter()
+    try:
+        with mock.patch.dict(os.environ, {'GMAIL_USER': 'me@example.org', 'GMAIL_APP_PASSWORD': 'secret'}):
+            transport = automation.ImapSmtpTransport.from_env(
+                imap_host='127.0.0.1', imap_port=imap_port, smtp_host='127.0.0.1', smtp_port=smtp_port,
+                use_ssl=False, mailbox='INBOX')
+        try:
+            thread = transport.find_thread(school, director)
+            if not thread or thread['reply_to'] != f"{director.lower()}@example.org":
+                raise RuntimeError(f"find_thread returned {thread}")
+            # Non-ASCII search terms must reach the server instead of failing in imaplib
+            accented = transport.find_thread(accented_school, accented_director)
+            if not accented or accented['reply_to'] != "lefevre@example.org":
+                raise RuntimeError(f"find_thread for {accented_school} returned {accented}")
+            if not transport.reply(thread, director, "cc@example.org", "Following up."):
+                raise RuntimeError("reply was not sent")
+        finally:
+            transport.close()
+    finally:
+        mail.shutdown()
+    elapsed = time.perf_counter() - started
+    if len(mail.received) != 1:
+        raise RuntimeError(f"stand-in received {len(mail.received)} messages")
+    sent = mail.received[0]
+    if sent['In-Reply-To'] != "<thread@example.org>" or not sent['Subject'].startswith("Re: "):
+        raise RuntimeError(f"reply not threaded: In-Reply-To={sent['In-Reply-To']}, Subject={sent['Subject']}")
+    return {'processed': 1, 'seconds': round(elapsed, 3)}
+
+def generate_contacts(rows, directors_per_school=3):
+    """Deterministic (school, last name, email, cc) rows, several directors per school"""
+    for i in range(rows):
+        school = f"Benchmark School {i // directors_per_school:05d}"
+        last_name = f"Director{i:06d}"
+        yield school, last_name, f"{last_name.lower()}@example.org", f"cc{i:06d}@example.org" if i % 4 == 0 else ''
+
+def write_workbook(path, rows):
+    """Write a generated contact sheet as .xlsx (write-only openpyxl) or .csv"""
+    contacts = generate_contacts(rows)
+    if path.endswith('.csv'):
+        import csv
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(SHEET_COLUMNS)
+            for contact in contacts:
+                writer.writerow(list(contact) + [''] * (len(SHEET_COLUMNS) - 4))
+        return path
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Sheet1')
+    worksheet.append(SHEET_COLUMNS)
+    for contact in contacts:
+        worksheet.append(list(contact) + [None] * (len(SHEET_COLUMNS) - 4))
+    workbook.save(path)
+    return path
+
+def load_automation(base_url=None):
+    """Import test.py as a module, pointing it at the fake Gmail when base_url is given"""
+    if base_url:
+        os.environ['GMAIL_BASE_URL'] = base_url
+    spec = importlib.util.spec_from_file_location('gmail_automation', os.path.join(HERE, 'test.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def run_ingest(automation, workdir, rows, extension):
+    """Stream a generated sheet through ContactSource cold (parse) and warm (cache)"""
+    path = write_workbook(os.path.join(workdir, f"ingest_{rows}{extension}"), rows)
+    result = {'rows': rows}
+    for label in ('cold', 'warm'):
+        tracemalloc.start()
+        started = time.perf_counter()
+        count = sum(1 for _ in automation.ContactSource(path))
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if count != rows:
+            raise RuntimeError(f"ContactSource yielded {count} of {rows} rows")
+        result[f"{label}_rows_per_second"] = round(rows / elapsed, 1) if elapsed else None
+        result[f"{label}_peak_python_mb"] = round(peak / (1024 * 1024), 2)
+    return result
+
+def run_end_to_end(automation, fake, workdir, base_url, rows, max_emails, mode, schedule, cached=False):
+    """Drive a full run in headless Chrome against the fake Gmail and report throughput
+
+    cached=True runs the scenario again in the directory of its first pass, so contacts go through
+    the thread index it left behind instead of searching.
+    """
+    # Each scenario gets its own directory so no thread index or journal carries over between modes
+    scenario_dir = os.path.join(workdir, f"e2e_{mode}_{'schedule' if schedule else 'send'}")
+    profile_dir = os.path.join(scenario_dir, 'profile')
+    sheet = os.path.join(scenario_dir, f"contacts_{rows}.xlsx")
+    if cached:
+        if not os.path.exists(os.path.join(scenario_dir, 'gmail_thread_index.json')):
+            raise RuntimeError("first pass left no thread index to reuse")
+    else:
+        os.makedirs(profile_dir, exist_ok=True)
+        write_workbook(sheet, rows)
+    # A saved session lets ensure_gmail_session skip the interactive login
+    with open(os.path.join(profile_dir, automation.SESSION_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'gmail_url': f"{base_url}/mail/u/0/#inbox"}, f)
+
+    bot = automation.GmailAutomationWithExcel(sheet, headless=True, profile_dir=profile_dir)
+    bot.require_confirmation = False
+    bot.unattended = True
+    bot.metrics.export_interval = 0
+
+    sent_before = len(fake.sent)
+    searches_before = fake.searches
+    started = time.perf_counter()
+    try:
+        if mode == 'grouped':
+            bot.process_contacts_grouped(max_emails=max_emails, schedule_emails=schedule)
+        elif mode == 'pipelined':
+            bot.process_contacts_pipelined(max_emails=max_emails, schedule_emails=schedule)
+        else:
+            bot.process_contacts(max_emails=max_emails, schedule_emails=schedule)
+    finally:
+        bot.close_driver()
+    elapsed = time.perf_counter() - started
+
+    # Only replies that reached the fake Gmail in the thread naming their director count towards throughput
+    sent = fake.sent[sent_before:]
+    misrouted = fake.misrouted(sent)
+    if misrouted:
+        raise RuntimeError(f"{len(misrouted)} of {len(sent)} replies went to the wrong thread: {misrouted[:5]}")
+    searches = fake.searches - searches_before
+    if cached and sent and searches >= len(sent):
+        raise RuntimeError(f"cached pass searched {searches} times for {len(sent)} replies")
+    processed = len(sent)
+    return {
+        'rows': rows,
+        'processed': processed,
+        'replies_received': processed,
+        'searches': searches,
+        'seconds': round(elapsed, 2),
+        'contacts_per_minute': round(processed * 60 / elapsed, 2) if elapsed else None,
+        'phases': bot.metrics.summary(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def compare(results, baseline, tolerance):
+    """List regressions beyond tolerance (throughput down or p95 latency up) against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        if 'error' in result:
+            regressions.append(f"{name}: failed ({result['error']})")
+            continue
+        if result.get('processed') == 0:
+            regressions.append(f"{name}: no contacts processed")
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ('contacts_per_minute', 'cold_rows_per_second', 'warm_rows_per_second'):
+            if result.get(metric) and base.get(metric) and result[metric] < base[metric] * (1 - tolerance):
+                regressions.append(f"{name}: {metric} {result[metric]} < baseline {base[metric]}")
+        for phase, stats in result.get('phases', {}).items():
+            base_stats = base.get('phases', {}).get(phase)
+            if base_stats and stats['p95_seconds'] > base_stats['p95_seconds'] * (1 + tolerance) + 0.05:
+                regressions.append(f"{name}: {phase} p95 {stats['p95_seconds']}s > baseline {base_stats['p95_seconds']}s")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Gmail automation against a local fake Gmail")
+    parser.add_argument('--ingest-rows', type=int, nargs='*', default=[100, 1000, 10000, 100000],
+                        help="Workbook sizes for the contact ingestion scenario")
+    parser.add_argument('--e2e-rows', type=int, default=100, help="Workbook size for end-to-end scenarios")
+    parser.add_argument('--max-emails', type=int, default=20, help="Contacts processed per end-to-end scenario")
+    parser.add_argument('--modes', nargs='*', default=['sequential', 'grouped', 'pipelined'],
+                        choices=['sequential', 'grouped', 'pipelined'])
+    parser.add_argument('--immediate', action='store_true', help="Send immediately instead of scheduling")
+    parser.add_argument('--skip-e2e', action='store_true', help="Only run the browser-free ingestion scenarios")
+    parser.add_argument('--latency-ms', type=int, default=50, help="Simulated fake Gmail response latency")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--output', default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='gmail_bench_')
+    fake = FakeGmail(generate_contacts(args.e2e_rows), latency=args.latency_ms / 1000.0)
+    server, base_url = fake.serve()
+    automation = load_automation(base_url)
+    print(f"🧪 Fake Gmail at {base_url}, working in {workdir}")
+
+    results = {}
+    try:
+        for rows in args.ingest_rows:
+            for extension in ('.xlsx', '.csv'):
+                name = f"ingest_{extension[1:]}_{rows}"
+                print(f"\n📊 {name}")
+                try:
+                    results[name] = run_ingest(automation, workdir, rows, extension)
+                except Exception as e:
+                    results[name] = {'error': str(e)}
+                print(f"   {results[name]}")
+
+        print("\n📊 transport_imap_smtp")
+        try:
+            results['transport_imap_smtp'] = run_transport_check(automation)
+        except Exception as e:
+            results['transport_imap_smtp'] = {'error': str(e)}
+        print(f"   {results['transport_imap_smtp']}")
+
+        if not args.skip_e2e:
+            for mode in args.modes:
+                # Second pass reuses the first pass's thread index (stale-view and cache-hit paths)
+                for cached in (False, True):
+                    name = f"e2e_{mode}_{'send' if args.immediate else 'schedule'}{'_cached' if cached else ''}"
+                    print(f"\n📊 {name}")
+                    try:
+                        results[name] = run_end_to_end(automation, fake, workdir, base_url, args.e2e_rows,
+                                                       args.max_emails, mode, not args.immediate, cached=cached)
+                    except Exception as e:
+                        results[name] = {'error': str(e)}
+                    print(f"   contacts/min: {results[name].get('contacts_per_minute')}, "
+                          f"replies: {results[name].get('replies_received')}, error: {results[name].get('error')}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    failures = [name for name, result in results.items() if 'error' in result]
+    if args.update_baseline and failures:
+        print(f"\n❌ Not updating the baseline, scenarios failed: {', '.join(failures)}")
+        return 1
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    else:
+        print(f"\n⚠️ No baseline at {args.baseline} - run with --update-baseline to record one")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
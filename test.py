@@ -1,5 +1,33 @@
+import abc
+import bisect
 import time
+import math
 import re
+import os
+import sys
+import json
+import socket
+import argparse
+import socketserver
+import contextlib
+import csv
+import hashlib
+import hmac
+import secrets
+import itertools
+import functools
+from collections import deque
+from collections import namedtuple
+import imaplib
+import smtplib
+from email import message_from_bytes
+from email import policy as email_policy
+from email.message import EmailMessage
+from email.utils import getaddresses, make_msgid, formatdate
+import queue
+import shutil
+import tempfile
+import threading
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -9,17 +37,1127 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementNotInteractableException
-from datetime import datetime, timedelta
+from selenium.common.exceptions import InvalidSelectorException, StaleElementReferenceException
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from urllib.parse import quote_plus, urlparse
+from html import escape as html_escape
+
+STATUS_DATE_COLUMNS = ('Date of Last Action', 'Next Action Due Date')
+DEFAULT_PROFILE_DIR = "gmail_automation_profile"
+SESSION_FILE_NAME = "automation_session.json"  # Stored inside the Chrome profile directory
+DAEMON_PORT = 8765
+DAEMON_TOKEN_FILE_NAME = "daemon_token"  # Client secret for the daemon, stored inside the Chrome profile directory
+# Gmail origin; pointed at a local fake Gmail by benchmark.py
+GMAIL_BASE_URL = os.environ.get('GMAIL_BASE_URL', 'https://mail.google.com').rstrip('/')
+GMAIL_HOST = urlparse(GMAIL_BASE_URL).netloc
+
+def parse_locator(selector):
+    """Turn a fallback selector into a (By, value) locator, rejecting jQuery-only CSS"""
+    if selector.startswith("//") or selector.startswith("(//"):
+        return By.XPATH, selector
+    if ':contains(' in selector:
+        raise ValueError(f"':contains()' is not valid CSS, use an XPath contains() instead: {selector}")
+    return By.CSS_SELECTOR, selector
+
+# Finds, deduplicates and describes every search-result row mentioning the query in one round trip
+CANDIDATE_DISCOVERY_SCRIPT = """
+var needle = arguments[0], limit = arguments[1];
+var root = document.querySelector("div[role='main']") || document.body;
+function clean(t) { return (t || '').replace(/\\s+/g, ' ').trim(); }
+var seenRows = new Set(), seenThreads = new Set(), candidates = [];
+var rows = root.querySelectorAll("tr[jsaction], tr.zA, .zA");
+for (var i = 0; i < rows.length && candidates.length < limit; i++) {
+    var row = rows[i].closest("tr") || rows[i];
+    if (seenRows.has(row)) { continue; }
+    seenRows.add(row);
+    var text = clean(row.innerText);
+    if (text.toLowerCase().indexOf(needle) < 0) { continue; }
+    var idEl = row.querySelector("[data-legacy-thread-id], [data-thread-id]");
+    var threadId = idEl ? (idEl.getAttribute('data-legacy-thread-id') || idEl.getAttribute('data-thread-id') || '').replace(/^#/, '') : '';
+    if (threadId) {
+        if (seenThreads.has(threadId)) { continue; }
+        seenThreads.add(threadId);
+    }
+    var senders = [];
+    row.querySelectorAll(".yW span[email], .yW .yP, .yW .zF").forEach(function (el) {
+        var name = clean(el.getAttribute('name') || el.innerText);
+        if (name && senders.indexOf(name) < 0) { senders.push(name); }
+    });
+    var subjectEl = row.querySelector(".bog, .y6 span");
+    var snippetEl = row.querySelector(".y2");
+    candidates.push({
+        element: row,
+        thread_id: threadId,
+        senders: senders,
+        subject: subjectEl ? clean(subjectEl.innerText) : '',
+        snippet: snippetEl ? clean(snippetEl.innerText).replace(/^-\\s*/, '') : '',
+        text: text
+    });
+}
+return candidates;
+"""
+
+# Collects everything the director check needs from an opened conversation in one round trip
+CONVERSATION_EXTRACT_SCRIPT = """
+function clean(t) { return (t || '').replace(/\\s+/g, ' ').trim(); }
+function visible(el) { return el.getClientRects().length > 0; }
+// Scope everything to the shown conversation: the search list may still be in the DOM (hidden or not)
+var header = Array.prototype.find.call(document.querySelectorAll("h2.hP"), visible) || null;
+var root = header ? header.parentElement : null;
+while (root && root !== document.body && !root.querySelector(".adn, .a3s")) { root = root.parentElement; }
+root = root || Array.prototype.find.call(document.querySelectorAll("[role='main']"), visible) || document.body;
+var senders = [], addresses = [], bodies = [], seen = {};
+root.querySelectorAll(".gD, .go span[email], .qu span[email], span[email]").forEach(function (el) {
+    if (!visible(el) || el.closest("tr.zA")) { return; }
+    var name = clean(el.getAttribute('name') || el.innerText);
+    var email = el.getAttribute('email') || '';
+    if (!name && !email) { return; }
+    if (!seen[name + '|' + email]) {
+        seen[name + '|' + email] = true;
+        senders.push({name: name, email: email});
+    }
+    if (email && addresses.indexOf(email) < 0) { addresses.push(email); }
+});
+root.querySelectorAll(".a3s, .ii.gt").forEach(function (el) {
+    if (!visible(el)) { return; }
+    var t = clean(el.innerText);
+    if (t.length > 10 && bodies.indexOf(t) < 0) { bodies.push(t); }
+});
+// Gmail puts the thread ids on the conversation header; list rows carry the same attribute
+return {
+    thread_id: header ? (header.getAttribute('data-legacy-thread-id') || header.getAttribute('data-thread-perm-id') || '') : '',
+    thread_perm_id: header ? (header.getAttribute('data-thread-perm-id') || '') : '',
+    subject: header ? clean(header.innerText) : '',
+    senders: senders,
+    addresses: addresses,
+    bodies: bodies,
+    text: clean(root.innerText)
+};
+"""
+
+# Returns the legacy/perm thread id from the shown conversation's header ('' when none is shown);
+# search-result rows carry the same attributes, so only h2.hP is read
+THREAD_DOM_ID_SCRIPT = """
+var el = Array.prototype.find.call(document.querySelectorAll("h2.hP"), function (h) { return h.getClientRects().length > 0; });
+return el ? (el.getAttribute('data-legacy-thread-id') || el.getAttribute('data-thread-perm-id') || '') : '';
+"""
+
+# Elements identifying the conversation on screen, most specific first; watched for staleness
+# when a fragment-only navigation cannot be checked against a thread id
+CONVERSATION_MARKER_SELECTORS = ("h2.hP", "div[role='main'] .a3s")
+
+# Resolves once any [selector, needle] condition holds, re-checking only when the DOM mutates
+READINESS_SCRIPT = """
+var conditions = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+var started = Date.now(), pending = false, finished = false, observer = null, timer = null;
+function check() {
+    for (var i = 0; i < conditions.length; i++) {
+        var selector = conditions[i][0], needle = conditions[i][1];
+        var elements = document.querySelectorAll(selector);
+        for (var j = 0; j < elements.length; j++) {
+            // Hidden views (e.g. the search list behind an open thread) never count as ready
+            if (elements[j].getClientRects().length === 0) { continue; }
+            if (!needle || (elements[j].textContent || '').toLowerCase().indexOf(needle) >= 0) { return selector; }
+        }
+    }
+    return null;
+}
+function finish(selector) {
+    if (finished) { return; }
+    finished = true;
+    if (observer) { observer.disconnect(); }
+    if (timer) { clearTimeout(timer); }
+    done({ready: selector !== null, selector: selector, waited_ms: Date.now() - started});
+}
+var hit = check();
+if (hit) { finish(hit); return; }
+observer = new MutationObserver(function () {
+    // Coalesce bursts of mutations into one check per task
+    if (pending) { return; }
+    pending = true;
+    setTimeout(function () { pending = false; var hit = check(); if (hit) { finish(hit); } }, 0);
+});
+observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true,
+                                             attributes: true, attributeFilter: ['style', 'class', 'hidden']});
+timer = setTimeout(function () { finish(check()); }, timeoutMs);
+"""
+
+# Counts elements under a selector whose text contains a needle, without sending any text back
+TEXT_MATCH_SCRIPT = """
+var selector = arguments[0], needle = arguments[1].toLowerCase(), limit = arguments[2];
+var elements = document.querySelectorAll(selector), count = 0;
+for (var i = 0; i < elements.length && (!limit || count < limit); i++) {
+    if ((elements[i].textContent || '').toLowerCase().indexOf(needle) >= 0) { count++; }
+}
+return count;
+"""
+
+# Replaces the compose body (keeping Gmail's signature block) with pre-formatted HTML as one
+# editor input event, then reports whether the expected text is now in the body
+COMPOSE_INSERT_SCRIPT = """
+var body = arguments[0], html = arguments[1], expected = arguments[2];
+function clean(t) { return (t || '').replace(/\\s+/g, ' ').trim(); }
+body.focus();
+var range = document.createRange();
+range.selectNodeContents(body);
+var signature = body.querySelector("[data-smartmail='gmail_signature'], .gmail_signature");
+if (signature) {
+    var top = signature;
+    while (top.parentNode && top.parentNode !== body) { top = top.parentNode; }
+    var start = top;
+    // Keep the "-- " separator that Gmail puts in front of the signature
+    var previous = top.previousSibling;
+    while (previous && clean(previous.textContent) === '') { previous = previous.previousSibling; }
+    if (previous && clean(previous.textContent) === '--') { start = previous; }
+    range.setEndBefore(start);
+}
+var selection = window.getSelection();
+selection.removeAllRanges();
+selection.addRange(range);
+var inserted = document.execCommand('insertHTML', false, html);
+if (!inserted) {
+    range.deleteContents();
+    range.insertNode(range.createContextualFragment(html));
+    body.dispatchEvent(new InputEvent('input', {bubbles: true, inputType: 'insertFromPaste'}));
+}
+var text = clean(body.innerText);
+return {inserted: inserted, verified: text.indexOf(clean(expected)) >= 0, signature: !!signature};
+"""
+
+# Finds the date and time inputs of the open schedule-send dialog by role and label
+SCHEDULE_INPUTS_SCRIPT = """
+function visible(el) { return el.getClientRects().length > 0; }
+function label(el) { return ((el.getAttribute('aria-label') || '') + ' ' + (el.getAttribute('placeholder') || '')).toLowerCase(); }
+var dialogs = Array.prototype.filter.call(document.querySelectorAll("[role='dialog'], [role='alertdialog']"), visible);
+if (!dialogs.length) { return null; }
+var inputs = Array.prototype.filter.call(dialogs[dialogs.length - 1].querySelectorAll("input:not([type='hidden'])"), visible);
+var date = inputs.find(function (el) { return label(el).indexOf('date') >= 0; }) || inputs[0] || null;
+var time = inputs.find(function (el) { return el !== date && label(el).indexOf('time') >= 0; }) ||
+           inputs.find(function (el) { return el !== date; }) || null;
+return [date, time];
+"""
+
+# Sheet columns every contact needs, mapped to ContactRecord fields
+CONTACT_COLUMNS = {
+    'School Name': 'school_name',
+    'Last Name': 'last_name',
+    'Email': 'email',
+    'CC': 'cc'
+}
+ContactRecord = namedtuple('ContactRecord', ['row_index', 'school_name', 'last_name', 'email', 'cc', 'fields'])
+
+def normalize_column(name):
+    """Sheet column or template field -> identifier ('Last Name' -> 'last_name')"""
+    return re.sub(r'[^0-9a-z]+', '_', str(name).lower()).strip('_')
+
+DEFAULT_EMAIL_TEMPLATE = """Hi Director {Last Name},
+
+test sending hello world
+maron"""
+
+class EmailTemplate:
+    """A body template compiled once into literal parts and normalized sheet-column fields"""
+    FIELD_PATTERN = re.compile(r'\{\{|\}\}|\{([^{}]+)\}')
+
+    def __init__(self, name, source):
+        self.name = name
+        self.hash = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+        self.literals, self.fields = self._compile(source)
+
+    @classmethod
+    def _compile(cls, source):
+        literals = ['']
+        fields = []
+        position = 0
+        for match in cls.FIELD_PATTERN.finditer(source):
+            literals[-1] += source[position:match.start()]
+            if match.group(1) is None:
+                literals[-1] += match.group(0)[0]  # {{ or }} escapes a brace
+            else:
+                fields.append(normalize_column(match.group(1)))
+                literals.append('')
+            position = match.end()
+        literals[-1] += source[position:]
+        return tuple(literals), tuple(fields)
+
+    @staticmethod
+    def format_value(value):
+        if value is None or (isinstance(value, float) and value != value):
+            return ''
+        if isinstance(value, datetime):
+            return value.strftime('%d/%m/%Y')
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    def render(self, values):
+        """Render one row from a dict keyed by normalized column names"""
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(self.format_value(values.get(field, '')))
+            parts.append(literal)
+        return ''.join(parts)
+
+    def render_frame(self, frame):
+        """Render every row of a DataFrame with normalized column names, one column at a time"""
+        bodies = pd.Series(self.literals[0], index=frame.index, dtype=object)
+        for field, literal in zip(self.fields, self.literals[1:]):
+            if field in frame:
+                bodies = bodies + frame[field].map(self.format_value)
+            bodies = bodies + literal
+        return bodies
+
+class ContactSource:
+    """Streams contacts from XLSX/CSV/Parquet as compact records, with a parsed-sheet cache"""
+    CACHE_VERSION = 2
+
+    def __init__(self, path, extra_columns=()):
+        self.path = path
+        self.extra_columns = tuple(column for column in extra_columns if column not in CONTACT_COLUMNS)
+        self.cache_path = path + '.contacts.cache'
+        self.total_rows = None  # Known up front for XLSX, otherwise after the first full pass
+
+    def __iter__(self):
+        cached = self._load_cache()
+        if cached is not None:
+            self.total_rows = len(cached)
+            yield from cached
+            return
+        
+        # Parse a snapshot: status compaction may rewrite the sheet while contacts are streamed
+        signature = self._file_signature()
+        snapshot, sha1 = self._snapshot()
+        try:
+            records = []
+            for record in self._parse(snapshot):
+                records.append(record)
+                yield record
+        finally:
+            os.remove(snapshot)
+        self.total_rows = len(records)
+        self._save_cache(records, signature, sha1)
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime, stat.st_size
+
+    def _file_hash(self):
+        digest = hashlib.sha1()
+        with open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _snapshot(self):
+        """Copy the sheet to a temporary file, hashing it on the way; returns (snapshot path, sha1)"""
+        digest = hashlib.sha1()
+        fd, snapshot = tempfile.mkstemp(prefix='contacts_', suffix=os.path.splitext(self.path)[1])
+        with os.fdopen(fd, 'wb') as target, open(self.path, 'rb') as source:
+            for chunk in iter(lambda: source.read(1 << 20), b''):
+                digest.update(chunk)
+                target.write(chunk)
+        return snapshot, digest.hexdigest()
+
+    @staticmethod
+    def _encode_value(value):
+        """JSON fallback for cell values: datetimes are tagged so they come back as datetimes"""
+        if isinstance(value, datetime):
+            return {'__datetime__': value.isoformat()}
+        return str(value)
+
+    @staticmethod
+    def _decode_object(obj):
+        if set(obj) == {'__datetime__'}:
+            return datetime.fromisoformat(obj['__datetime__'])
+        return obj
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return None
+        try:
+            # JSON, not pickle: the cache sits next to the sheet, possibly in a shared folder
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f, object_hook=self._decode_object)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cache, dict) or cache.get('version') != self.CACHE_VERSION or \
+                tuple(cache.get('extra_columns') or ()) != self.extra_columns:
+            return None
+        
+        mtime, size = self._file_signature()
+        if cache['mtime'] != mtime or cache['size'] != size:
+            # Touched but possibly unchanged (e.g. copied): fall back to the content hash
+            if cache['size'] != size or cache['sha1'] != self._file_hash():
+                return None
+            cache['mtime'] = mtime
+            self._write_cache(cache)
+        return [ContactRecord(*record) for record in cache['records']]
+
+    def _save_cache(self, records, signature, sha1):
+        """Cache records under the signature taken before parsing (the sheet may have been compacted since)"""
+        mtime, size = signature
+        self._write_cache({
+            'version': self.CACHE_VERSION,
+            'extra_columns': self.extra_columns,
+            'mtime': mtime,
+            'size': size,
+            'sha1': sha1,
+            'records': [tuple(record) for record in records]
+        })
+
+    def _write_cache(self, cache):
+        try:
+            temp_path = self.cache_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, default=self._encode_value)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not write contact cache: {str(e)}")
+
+    def _parse(self, path):
+        extension = os.path.splitext(self.path)[1].lower()
+        if extension in ('.xlsx', '.xlsm'):
+            rows = self._xlsx_rows(path)
+        elif extension == '.csv':
+            rows = self._csv_rows(path)
+        elif extension == '.parquet':
+            rows = self._parquet_rows(path)
+        else:
+            rows = self._pandas_rows(path)
+        
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = {column: index for index, column in enumerate(header)}
+        missing = [column for column in CONTACT_COLUMNS if column not in positions]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+        
+        # Extra columns may be given as normalized identifiers (e.g. template fields)
+        normalized = {normalize_column(column): index for index, column in enumerate(header)}
+        wanted = list(CONTACT_COLUMNS) + list(self.extra_columns)
+        wanted_positions = [positions.get(column, normalized.get(normalize_column(column))) for column in wanted]
+        for row_index, row in enumerate(rows):
+            values = [self._clean(row[position]) if position is not None and position < len(row) else ''
+                      for position in wanted_positions]
+            if not any(values):
+                continue  # Blank row - keep counting so row_index still matches the sheet
+            yield ContactRecord(row_index, values[0], values[1], values[2], values[3],
+                                dict(zip(self.extra_columns, values[4:])))
+
+    @staticmethod
+    def _clean(value):
+        if value is None or (isinstance(value, float) and value != value):
+            return ''
+        return value.strip() if isinstance(value, str) else value
+
+    def _xlsx_rows(self, path):
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook.worksheets[0]
+            if worksheet.max_row:
+                self.total_rows = worksheet.max_row - 1
+            yield from worksheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def _csv_rows(self, path):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.reader(f)
+
+    def _parquet_rows(self, path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet contact sheets requires pyarrow (pip install pyarrow)")
+        
+        parquet_file = pq.ParquetFile(path)
+        wanted = {normalize_column(column) for column in list(CONTACT_COLUMNS) + list(self.extra_columns)}
+        columns = [column for column in parquet_file.schema_arrow.names if normalize_column(column) in wanted]
+        self.total_rows = parquet_file.metadata.num_rows
+        yield columns
+        for batch in parquet_file.iter_batches(columns=columns):
+            yield from zip(*(batch.column(name).to_pylist() for name in columns))
+
+    def _pandas_rows(self, path):
+        df = pd.read_excel(path)
+        self.total_rows = len(df)
+        yield list(df.columns)
+        yield from df.itertuples(index=False, name=None)
+
+class StatusJournal:
+    """Append-only JSONL journal of per-row status updates"""
+    def __init__(self, path):
+        self.path = path
+        self._handle = None
+
+    def append(self, record):
+        """Append one record in constant time and flush it to disk"""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Append several records with a single flush to disk"""
+        if self._handle is None:
+            self._handle = open(self.path, 'a', encoding='utf-8')
+        self._handle.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def read(self):
+        """Return all journaled records, ignoring a torn trailing line"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def clear(self):
+        """Drop all journaled records once they have been compacted"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+class ContactCheckpoint(StatusJournal):
+    """Durable per-contact outcome log keyed by a stable contact id (school + email)"""
+    COMPLETE_STATES = ('done', 'skipped')
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._states = None
+
+    @staticmethod
+    def make_id(school_name, email):
+        return "|".join(re.sub(r'\s+', ' ', str(part)).strip().lower() for part in (school_name, email))
+
+    @staticmethod
+    def state_for(success_status):
+        return {'Scheduled': 'done', 'Successful': 'done', 'Skipped': 'skipped'}.get(success_status, 'failed')
+
+    def _load(self):
+        if self._states is None:
+            records = self.read()
+            self._states = {record['id']: record['state'] for record in records if 'id' in record}
+            # Rewrite a log dominated by superseded records as one line per contact
+            if len(records) > 2 * len(self._states) + 100:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for contact_id, state in self._states.items():
+                        f.write(json.dumps({'id': contact_id, 'state': state}) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+        return self._states
+
+    def state(self, contact_id):
+        return self._load().get(contact_id)
+
+    def is_complete(self, contact_id):
+        return self._load().get(contact_id) in self.COMPLETE_STATES
+
+    def mark(self, contact_id, state, row_index=None):
+        """Record a contact's state durably before returning"""
+        self.mark_many([(contact_id, row_index)], state)
+
+    def mark_many(self, contacts, state):
+        """Record the same state for several (contact_id, row_index) pairs with one fsync"""
+        if not contacts:
+            return
+        states = self._load()
+        now = datetime.now().isoformat()
+        records = []
+        for contact_id, row_index in contacts:
+            states[contact_id] = state
+            records.append({'id': contact_id, 'state': state, 'row': row_index, 'at': now})
+        self.append_many(records)
+
+    def pending(self):
+        """Number of contacts that failed or were interrupted mid-flight"""
+        return sum(1 for state in self._load().values() if state not in self.COMPLETE_STATES)
+
+    def recorded(self):
+        """Number of contacts the checkpoint holds a state for"""
+        return len(self._load())
+
+    def clear(self):
+        super().clear()
+        self._states = {}
+
+class ThreadIndexCache:
+    """Persistent (school, director) -> Gmail thread index with TTL and LRU eviction"""
+    def __init__(self, path, ttl_days=30, max_entries=5000, save_every=20):
+        self.path = path
+        self.ttl = timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        self.save_every = save_every  # Cache hits only touch last_used, so they are written in batches
+        self._entries = None
+        self._unsaved = 0
+        self._lock = threading.Lock()  # Shared by parallel workers
+
+    @staticmethod
+    def make_key(school_name, director_last_name):
+        return "|".join(re.sub(r'\s+', ' ', str(part)).strip().lower()
+                        for part in (school_name, director_last_name))
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError):
+                    self._entries = {}
+        return self._entries
+
+    def save(self):
+        """Write hits not yet on disk (called at the end of a run)"""
+        with self._lock:
+            if self._unsaved:
+                self._save_locked()
+
+    def _save_locked(self):
+        """Write the index atomically"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._load(), f)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+    def get(self, school_name, director_last_name):
+        """Return the cached thread entry, dropping it if it has expired"""
+        with self._lock:
+            entries = self._load()
+            key = self.make_key(school_name, director_last_name)
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            if datetime.now() - datetime.fromisoformat(entry['saved_at']) > self.ttl:
+                del entries[key]
+                self._save_locked()
+                return None
+            entry['last_used'] = datetime.now().isoformat()
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save_locked()
+            return dict(entry)
+
+    def put(self, school_name, director_last_name, dom_thread_id, url):
+        """Remember the thread used for a contact, evicting least recently used entries
+
+        dom_thread_id is the legacy/perm id carried by the conversation view ('' if none was shown).
+        """
+        with self._lock:
+            entries = self._load()
+            now = datetime.now().isoformat()
+            entries[self.make_key(school_name, director_last_name)] = {
+                'dom_thread_id': dom_thread_id,
+                'url': url,
+                'saved_at': now,
+                'last_used': now
+            }
+            if len(entries) > self.max_entries:
+                by_age = sorted(entries, key=lambda key: entries[key]['last_used'])
+                for key in by_age[:len(entries) - self.max_entries]:
+                    del entries[key]
+            self._save_locked()
+
+    def invalidate(self, school_name, director_last_name):
+        with self._lock:
+            entries = self._load()
+            if entries.pop(self.make_key(school_name, director_last_name), None) is not None:
+                self._save_locked()
+
+class SelectorRegistry:
+    """Per-selector hit/miss statistics persisted across runs, used to try known winners first"""
+    def __init__(self, path, save_every=20):
+        self.path = path
+        self.save_every = save_every
+        self._stats = None
+        self._unsaved = 0
+        self._lock = threading.Lock()  # Shared by parallel workers
+
+    def _load(self):
+        if self._stats is None:
+            self._stats = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._stats = json.load(f)
+                except (OSError, ValueError):
+                    self._stats = {}
+        return self._stats
+
+    def order(self, group, selectors):
+        """Known winners first (most hits), then untried selectors, then ones that never hit"""
+        with self._lock:
+            group_stats = self._load().get(group, {})
+        
+        def rank(selector):
+            stats = group_stats.get(selector)
+            if stats is None:
+                return (1, 0, 0)
+            if stats['hits'] > 0:
+                return (0, -stats['hits'], stats['misses'])
+            return (2, 0, stats['misses'])
+        
+        return sorted(selectors, key=rank)
+
+    def record(self, group, selector, hit):
+        with self._lock:
+            stats = self._load().setdefault(group, {}).setdefault(selector, {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save_locked()
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        if self._stats is None or not self._unsaved:
+            return
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._stats, f, indent=2)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+class PhaseMetrics:
+    """Thread-safe latency spans per automation phase, exported as JSON and a Prometheus textfile"""
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, json_path, prom_path, export_interval=60, max_samples=10000):
+        self.json_path = json_path
+        self.prom_path = prom_path
+        self.export_interval = export_interval  # Seconds between periodic exports (0 = end of run only)
+        self.max_samples = max_samples
+        self._samples = {}
+        self._totals = {}
+        self._errors = {}
+        self._last_export = time.monotonic()
+        self._lock = threading.Lock()  # Shared by parallel workers
+
+    @contextlib.contextmanager
+    def span(self, phase):
+        """Time the enclosed block as one sample of phase (exceptions are counted and re-raised)"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                self._errors[phase] = self._errors.get(phase, 0) + 1
+            raise
+        finally:
+            self.record(phase, time.perf_counter() - started)
+
+    def record(self, phase, seconds):
+        with self._lock:
+            if phase not in self._samples:
+                self._samples[phase] = deque(maxlen=self.max_samples)
+                self._totals[phase] = [0, 0.0]
+            self._samples[phase].append(seconds)
+            self._totals[phase][0] += 1
+            self._totals[phase][1] += seconds
+
+    @staticmethod
+    def quantile(ordered, q):
+        """Nearest-rank quantile of an already sorted list"""
+        return ordered[max(0, min(len(ordered), math.ceil(q * len(ordered))) - 1)]
+
+    def summary(self):
+        with self._lock:
+            phases = {phase: (sorted(samples), list(self._totals[phase]), self._errors.get(phase, 0))
+                      for phase, samples in self._samples.items()}
+        result = {}
+        for phase, (ordered, (count, total), errors) in sorted(phases.items()):
+            result[phase] = {
+                'count': count,
+                'errors': errors,
+                'sum_seconds': round(total, 4),
+                'max_seconds': round(ordered[-1], 4),
+                **{f"p{int(q * 100)}_seconds": round(self.quantile(ordered, q), 4) for q in self.QUANTILES}
+            }
+        return result
+
+    def prometheus_text(self, summary):
+        lines = [
+            "# HELP gmail_automation_phase_seconds Latency of Gmail automation phases",
+            "# TYPE gmail_automation_phase_seconds summary"
+        ]
+        for phase, stats in summary.items():
+            for q in self.QUANTILES:
+                lines.append(f'gmail_automation_phase_seconds{{phase="{phase}",quantile="{q}"}} '
+                             f'{stats[f"p{int(q * 100)}_seconds"]}')
+            lines.append(f'gmail_automation_phase_seconds_sum{{phase="{phase}"}} {stats["sum_seconds"]}')
+            lines.append(f'gmail_automation_phase_seconds_count{{phase="{phase}"}} {stats["count"]}')
+        lines.append("# HELP gmail_automation_phase_errors_total Phases that raised an exception")
+        lines.append("# TYPE gmail_automation_phase_errors_total counter")
+        for phase, stats in summary.items():
+            lines.append(f'gmail_automation_phase_errors_total{{phase="{phase}"}} {stats["errors"]}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write_atomic(path, text):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def export(self):
+        """Write the current percentiles to both files"""
+        summary = self.summary()
+        self._last_export = time.monotonic()
+        if not summary:
+            return
+        try:
+            self._write_atomic(self.json_path, json.dumps(
+                {'updated': datetime.now().isoformat(), 'phases': summary}, indent=2))
+            self._write_atomic(self.prom_path, self.prometheus_text(summary))
+        except OSError as e:
+            print(f"⚠️ Could not export run metrics: {str(e)}")
+
+    def maybe_export(self):
+        if self.export_interval and time.monotonic() - self._last_export >= self.export_interval:
+            self.export()
+
+def timed(phase):
+    """Record each call of the decorated bot method as a span of phase"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.span(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+class SendWindowScheduler:
+    """Account-wide rate-limited send times inside a daily window, evaluated in each recipient's timezone"""
+    def __init__(self, window_start='22:00', window_end='06:00', rate_per_hour=60, burst=1, lead_minutes=2):
+        self.window_start = datetime.strptime(window_start.strip(), '%H:%M').time()
+        self.window_end = datetime.strptime(window_end.strip(), '%H:%M').time()
+        self.interval = timedelta(seconds=3600.0 / rate_per_hour)
+        self.burst = max(1, int(burst))
+        self.lead = timedelta(minutes=lead_minutes)  # Gmail only accepts times in the future
+        self._reserved = []  # Sorted UTC send times handed out so far, shared by every timezone
+        self._lock = threading.Lock()  # Shared by parallel workers
+
+    @classmethod
+    def from_spec(cls, window, rate_per_hour=60, burst=1):
+        """Build from a 'HH:MM-HH:MM' window string"""
+        start, end = window.split('-', 1)
+        return cls(start, end, rate_per_hour=rate_per_hour, burst=burst)
+
+    @staticmethod
+    def resolve_timezone(name):
+        if name:
+            try:
+                return ZoneInfo(str(name).strip())
+            except (ZoneInfoNotFoundError, ValueError):
+                print(f"⚠️ Unknown timezone '{name}', using local time")
+        return datetime.now().astimezone().tzinfo
+
+    def fit_to_window(self, moment, tz):
+        """Earliest instant at or after moment that falls inside the window in tz"""
+        local = moment.astimezone(tz)
+        for offset in (-1, 0, 1):
+            start = datetime.combine(local.date() + timedelta(days=offset), self.window_start, tzinfo=tz)
+            end_date = start.date() + timedelta(days=1 if self.window_end <= self.window_start else 0)
+            end = datetime.combine(end_date, self.window_end, tzinfo=tz)
+            if local < end:
+                return max(local, start)
+        return datetime.combine(local.date() + timedelta(days=2), self.window_start, tzinfo=tz)
+
+    def next_slot(self, timezone_name=None, now=None):
+        """Reserve the next send time for a recipient: the earliest instant inside their window that keeps
+        the whole account within the rate (at most burst sends closer together than one interval)"""
+        tz = self.resolve_timezone(timezone_name)
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            # Slots older than one interval can no longer conflict with anything
+            del self._reserved[:bisect.bisect_left(self._reserved, now - self.interval)]
+            candidate = now + self.lead
+            while True:
+                slot = self.fit_to_window(candidate, tz)
+                if slot.second or slot.microsecond:
+                    # Gmail's picker has minute resolution
+                    slot = slot.replace(second=0, microsecond=0) + timedelta(minutes=1)
+                slot = slot.astimezone(timezone.utc)
+                # A recipient whose window opens later searches forward for a free slot instead of
+                # pushing back the ones already handed out
+                low = bisect.bisect_right(self._reserved, slot - self.interval)
+                high = bisect.bisect_left(self._reserved, slot + self.interval)
+                if high - low < self.burst:
+                    break
+                candidate = self._reserved[high - 1] + self.interval
+            bisect.insort(self._reserved, slot)
+        return slot.astimezone(tz)
+
+class GmailTransport(abc.ABC):
+    """Backend that finds a contact's thread and replies to it"""
+    name = "transport"
+    supports_schedule = False
+
+    @abc.abstractmethod
+    def find_thread(self, school_name, director_last_name, auto_select=True):
+        """Return a handle for the director's thread at the school, or None"""
+
+    @abc.abstractmethod
+    def reply(self, thread, director_last_name, cc_emails, body, schedule_send=False, send_at=None):
+        """Reply to the thread returned by find_thread (at send_at when scheduling); returns True on success"""
+
+    def close(self):
+        pass
+
+class SeleniumTransport(GmailTransport):
+    """Gmail web UI automation (the default and fallback backend)"""
+    name = "browser"
+    supports_schedule = True
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    def find_thread(self, school_name, director_last_name, auto_select=True):
+        self.bot.current_director_name = director_last_name
+        # The selected conversation stays open in the browser; the handle is just a marker
+        return self.bot.search_school_and_select(school_name, auto_select=auto_select) or None
+
+    def reply(self, thread, director_last_name, cc_emails, body, schedule_send=False, send_at=None):
+        return self.bot.reply_to_message(director_last_name, cc_emails, schedule_send=schedule_send,
+                                         email_body=body, send_at=send_at)
+
+class ImapSmtpTransport(GmailTransport):
+    """IMAP SEARCH + SMTP backend that replies with proper In-Reply-To/References headers"""
+    name = "imap/smtp"
+    supports_schedule = False
+
+    def __init__(self, username, password, imap_host='imap.gmail.com', smtp_host='smtp.gmail.com',
+                 imap_port=993, smtp_port=587, use_ssl=True, mailbox='"[Gmail]/All Mail"',
+                 from_address=None, max_candidates=15):
+        self.username = username
+        self.password = password
+        self.imap_host = imap_host
+        self.smtp_host = smtp_host
+        self.imap_port = imap_port
+        self.smtp_port = smtp_port
+        self.use_ssl = use_ssl  # Off for a local IMAP/SMTP stand-in
+        self.mailbox = mailbox
+        self.from_address = from_address or username
+        self.max_candidates = max_candidates
+        self.imap = None
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Build from GMAIL_USER / GMAIL_APP_PASSWORD plus optional server settings, or None
+
+        GMAIL_IMAP_HOST/PORT, GMAIL_SMTP_HOST/PORT, GMAIL_MAILBOX and GMAIL_USE_SSL=0 point it at a
+        local IMAP/SMTP stand-in; keyword overrides (e.g. from the CLI) win over the environment.
+        """
+        username = os.environ.get('GMAIL_USER')
+        password = os.environ.get('GMAIL_APP_PASSWORD')
+        if not username or not password:
+            return None
+        settings = {
+            'imap_host': os.environ.get('GMAIL_IMAP_HOST', 'imap.gmail.com'),
+            'smtp_host': os.environ.get('GMAIL_SMTP_HOST', 'smtp.gmail.com'),
+            'imap_port': int(os.environ.get('GMAIL_IMAP_PORT', 993)),
+            'smtp_port': int(os.environ.get('GMAIL_SMTP_PORT', 587)),
+            'use_ssl': os.environ.get('GMAIL_USE_SSL', '1').strip().lower() not in ('0', 'false', 'no', 'off'),
+            'mailbox': os.environ.get('GMAIL_MAILBOX', '"[Gmail]/All Mail"'),
+            'from_address': os.environ.get('GMAIL_FROM')
+        }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(username, password, **settings)
+
+    def connect(self):
+        if self.imap is not None:
+            return
+        if self.use_ssl:
+            self.imap = imaplib.IMAP4_SSL(self.imap_host, self.imap_port)
+        else:
+            self.imap = imaplib.IMAP4(self.imap_host, self.imap_port)
+        self.imap.login(self.username, self.password)
+        # Gmail only lists ENABLE/UTF8=ACCEPT once logged in
+        status, data = self.imap.capability()
+        if status == 'OK' and data and data[0]:
+            self.imap.capabilities = tuple(data[0].decode('ascii', 'replace').upper().split())
+        if 'UTF8=ACCEPT' in self.imap.capabilities and 'ENABLE' in self.imap.capabilities:
+            self.imap.enable('UTF8=ACCEPT')
+        status, _ = self.imap.select(self.mailbox, readonly=True)
+        if status != 'OK':
+            self.imap.select('INBOX', readonly=True)
+
+    def search(self, query):
+        """Return matching message UIDs, newest last (Gmail raw search when the server supports it)"""
+        query = query.replace('"', '').replace('\\', '')
+        if 'X-GM-EXT-1' in self.imap.capabilities:
+            key, value = 'X-GM-RAW', '"%s"' % query
+        else:
+            key, value = 'TEXT', query
+        if self.imap.utf8_enabled:
+            args = (key, '"%s"' % value.replace('"', '\\"'))
+        elif value.isascii():
+            args = ('CHARSET', 'UTF-8', key, '"%s"' % value.replace('"', '\\"'))
+        else:
+            # imaplib only sends ASCII arguments; non-ASCII terms (e.g. "École") go as a UTF-8 literal
+            self.imap.literal = value.encode('utf-8')
+            args = ('CHARSET', 'UTF-8', key)
+        status, data = self.imap.uid('SEARCH', *args)
+        if status != 'OK' or not data or not data[0]:
+            return []
+        return data[0].split()
+
+    def find_thread(self, school_name, director_last_name, auto_select=True):
+        try:
+            self.connect()
+            uids = self.search(school_name)[-self.max_candidates:]
+            if not uids:
+                return None
+            status, data = self.imap.uid(
+                'FETCH', b','.join(uids),
+                '(BODY.PEEK[HEADER.FIELDS (FROM TO CC SUBJECT MESSAGE-ID REFERENCES IN-REPLY-TO)])')
+            if status != 'OK':
+                return None
+        except Exception as e:
+            # Anything going wrong here (including encoding errors) must fall back to the browser
+            print(f"⚠️ IMAP search failed: {str(e)}")
+            self.close()
+            return None
+        
+        name = str(director_last_name).lower()
+        if not name:
+            return None
+        headers = [message_from_bytes(part[1], policy=email_policy.default) for part in data if isinstance(part, tuple)]
+        
+        # Newest first; prefer a message the director sent, then one they were addressed on
+        for fields in (('From',), ('To', 'Cc')):
+            for message in reversed(headers):
+                addresses = getaddresses(sum((message.get_all(field, []) for field in fields), []))
+                for display_name, address in addresses:
+                    if name in display_name.lower() or name in address.lower():
+                        return {
+                            'message_id': str(message.get('Message-ID', '')),
+                            'references': str(message.get('References', '')),
+                            'subject': str(message.get('Subject', '')),
+                            'reply_to': address
+                        }
+        return None
+
+    def reply(self, thread, director_last_name, cc_emails, body, schedule_send=False, send_at=None):
+        if schedule_send:
+            return False
+        
+        try:
+            message = EmailMessage()
+            message['From'] = self.from_address
+            message['To'] = thread['reply_to']
+            if cc_emails and cc_emails.strip():
+                message['Cc'] = cc_emails
+            subject = thread['subject']
+            message['Subject'] = subject if subject.lower().startswith('re:') else f"Re: {subject}"
+            message['Date'] = formatdate(localtime=True)
+            message['Message-ID'] = make_msgid()
+            if thread['message_id']:
+                message['In-Reply-To'] = thread['message_id']
+                message['References'] = f"{thread['references']} {thread['message_id']}".strip()
+            message.set_content(body)
+            
+            if self.use_ssl and self.smtp_port == 465:
+                smtp = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port)
+            else:
+                smtp = smtplib.SMTP(self.smtp_host, self.smtp_port)
+            with smtp:
+                if self.use_ssl and self.smtp_port != 465:
+                    smtp.starttls()
+                smtp.ehlo()
+                if self.password and smtp.has_extn('auth'):
+                    smtp.login(self.username, self.password)
+                smtp.send_message(message)
+            return True
+        except Exception as e:
+            print(f"⚠️ SMTP send failed: {str(e)}")
+            return False
+
+    def close(self):
+        if self.imap is not None:
+            try:
+                self.imap.logout()
+            except Exception:
+                pass
+            self.imap = None
 
 class GmailAutomationWithExcel:
-    def __init__(self, excel_file_path, headless=False):
+    def __init__(self, excel_file_path, headless=False, profile_dir=None):
         self.driver = None
         self.wait = None
         self.headless = headless
+        # Chrome user-data directory holding the logged-in session (always used in headless mode)
+        self.profile_dir = profile_dir or (DEFAULT_PROFILE_DIR if headless else None)
+        self.unattended = False  # Skip manual prompts (used by parallel workers)
+        self.input_func = input  # Replaced by the daemon to forward prompts to the submitting CLI
+        self.transport = None  # Optional protocol backend (e.g. ImapSmtpTransport) tried before the browser
+        self.browser_transport = SeleniumTransport(self)
         self.excel_file_path = excel_file_path
-        self.df = None
+        self.df = None  # Only loaded when the journal has to fall back to a full rewrite
+        self.contact_source = None
+        self.extra_contact_columns = ()  # Additional sheet columns to carry on each ContactRecord
         self.current_director_name = ""
         self.require_confirmation = True
+        self.status_journal = StatusJournal(excel_file_path + '.journal.jsonl')
+        self.checkpoint = ContactCheckpoint(excel_file_path + '.checkpoint.jsonl')
+        self._row_contact_ids = {}  # row_index -> contact id for rows handed out this run
+        self._contacts_exhausted = False
+        self.resume = False  # Continue the checkpoint of an interrupted run instead of starting a new one
+        self.journal_checkpoint_every = 25  # Compact journal into workbook every N updates (0 = end of run only)
+        self._journal_pending = 0
+        # Per-phase wait timeouts (seconds) and settle window used by wait_for
+        self.wait_timeouts = {
+            'inbox': 20,
+            'search_url': 15,
+            'search_results': 15,
+            'conversation': 10,
+            'navigation': 10,
+            'compose_open': 10,
+            'cc_field': 5,
+            'send_menu': 10,
+            'schedule_dialog': 10,
+            'compose_closed': 10
+        }
+        self.settle_window = 0.3
+        self.single_roundtrip_extraction = True  # Read opened conversations with one execute_script call
+        self.selector_registry = SelectorRegistry(
+            os.path.join(os.path.dirname(os.path.abspath(excel_file_path)), 'gmail_selector_stats.json'))
+        self.url_search = True  # Search via #search/<query> URL instead of typing into the search box
+        self.thread_cache = ThreadIndexCache(
+            os.path.join(os.path.dirname(os.path.abspath(excel_file_path)), 'gmail_thread_index.json'))
+        self.group_payloads = None  # thread_id -> extracted conversation, shared by one school group
+        self.template_dir = None  # Defaults to email_templates/ next to the sheet (<segment>.txt files)
+        self.template_column = 'Segment'  # Sheet column choosing the template per row (falls back to default)
+        self.email_templates = None
+        self.rendered_bodies = {}  # row_index -> body prepared by prepare_email_bodies
+        self._body_cache = None  # Rendered-body cache, loaded once per run and written when the run's stream ends
+        self._body_cache_dirty = False
+        self.send_scheduler = SendWindowScheduler()  # Spreads scheduled sends over the night
+        self.timezone_column = 'Timezone'  # Optional sheet column with the recipient's IANA timezone
+        self.metrics = PhaseMetrics(
+            os.path.join(os.path.dirname(os.path.abspath(excel_file_path)), 'gmail_run_metrics.json'),
+            os.path.join(os.path.dirname(os.path.abspath(excel_file_path)), 'gmail_run_metrics.prom'))
         
     def safe_click(self, element):
         """Robust click that tries multiple methods to click an element."""
@@ -53,6 +1191,153 @@ class GmailAutomationWithExcel:
 
         return False
 
+    def find_with_selectors(self, group, selectors, timeout=10, clickable=True):
+        """Race all fallback selectors in one wait with a shared deadline; returns (element, selector) or (None, None)"""
+        locators = []
+        for selector in self.selector_registry.order(group, selectors):
+            try:
+                locators.append((selector,) + parse_locator(selector))
+            except ValueError as e:
+                print(f"⚠️ Skipping invalid selector for {group}: {str(e)}")
+        
+        def first_match(driver):
+            # Known winners are checked first on every poll
+            for selector, by, value in locators:
+                try:
+                    for element in driver.find_elements(by, value):
+                        if not clickable or (element.is_displayed() and element.is_enabled()):
+                            return element, selector
+                except (InvalidSelectorException, StaleElementReferenceException):
+                    continue
+            return False
+        
+        try:
+            element, selector = WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(first_match)
+        except TimeoutException:
+            for selector, _, _ in locators:
+                self.selector_registry.record(group, selector, False)
+            return None, None
+        
+        self.selector_registry.record(group, selector, True)
+        return element, selector
+
+    def ask(self, prompt):
+        """Prompt the operator (terminal or daemon client) and return the answer"""
+        return self.input_func(prompt)
+
+    def manual_fallback(self, prompt):
+        """Ask the user to finish a step by hand; returns False when running unattended"""
+        if self.unattended:
+            print("⏭️ Unattended mode - skipping manual step")
+            return False
+        self.ask(prompt)
+        return True
+
+    def wait_for(self, phase, condition, timeout=None, settle=True):
+        """Wait for a concrete DOM/URL condition using the phase timeout plus a short settle window"""
+        if timeout is None:
+            timeout = self.wait_timeouts.get(phase, 10)
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(condition)
+        except TimeoutException:
+            print(f"⚠️ Timed out after {timeout}s waiting for {phase}")
+            return False
+        if settle and self.settle_window:
+            time.sleep(self.settle_window)
+        return result
+
+    def wait_for_dom(self, phase, conditions, timeout=None, settle=True):
+        """Wait in-page for any [selector, needle] condition; returns the matched selector, False on timeout,
+        or None when the observer could not run (callers then fall back to polling)"""
+        if timeout is None:
+            timeout = self.wait_timeouts.get(phase, 10)
+        conditions = [[selector, (needle or '').lower()] for selector, needle in conditions]
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            result = self.driver.execute_async_script(READINESS_SCRIPT, conditions, int(timeout * 1000))
+        except TimeoutException:
+            print(f"⚠️ Timed out after {timeout}s waiting for {phase}")
+            return False
+        except Exception as e:
+            print(f"⚠️ Readiness observer unavailable for {phase}: {str(e)}")
+            return None
+        if not result or not result.get('ready'):
+            print(f"⚠️ Timed out after {timeout}s waiting for {phase}")
+            return False
+        if settle and self.settle_window:
+            time.sleep(self.settle_window)
+        return result['selector']
+
+    def count_text_matches(self, selector, needle, limit=0):
+        """Count elements matching selector whose text contains needle (evaluated in the page)"""
+        return self.driver.execute_script(TEXT_MATCH_SCRIPT, selector, needle, limit)
+
+    def results_mention(self, needle):
+        """True if a search result row mentions needle (the whole main pane only when no row does)"""
+        if self.count_text_matches("div[role='main'] tr.zA", needle, limit=1):
+            return True
+        return bool(self.count_text_matches("div[role='main']", needle, limit=1))
+
+    def wait_for_search_results_rows(self, timeout=None):
+        """Wait until the search result list (or Gmail's no-results message) is rendered"""
+        return self.wait_for('search_results', lambda driver: driver.find_elements(
+            By.CSS_SELECTOR, "tr.zA, div[role='main'] td.TC"), timeout=timeout)
+
+    @staticmethod
+    def thread_selector(thread_id):
+        """CSS selector for the header of the conversation view carrying thread_id
+
+        Search-result rows carry the same data attributes, so only the conversation header (h2.hP) counts.
+        """
+        thread_id = str(thread_id).replace('"', '')
+        return f'h2.hP[data-legacy-thread-id="{thread_id}"], h2.hP[data-thread-perm-id="{thread_id}"]'
+
+    def wait_for_conversation_view(self, timeout=None, thread_id=None):
+        """Wait until an opened conversation's messages are rendered (for thread_id, once that thread is shown)"""
+        if thread_id:
+            # A fragment-only navigation keeps the previous thread in the DOM until Gmail swaps it out
+            selector = self.thread_selector(thread_id)
+            ready = self.wait_for_dom('conversation', [(selector, '')], timeout=timeout)
+            if ready is not None:
+                return ready
+            return self.wait_for('conversation', lambda driver: any(
+                element.is_displayed() for element in driver.find_elements(By.CSS_SELECTOR, selector)), timeout=timeout)
+        ready = self.wait_for_dom('conversation', [("div[role='main'] .a3s", ''), ("div[role='main'] .ii.gt", ''),
+                                                   ("h2.hP", '')], timeout=timeout)
+        if ready is not None:
+            return ready
+        return self.wait_for('conversation', lambda driver: any(element.is_displayed() for element in driver.find_elements(
+            By.CSS_SELECTOR, "div[role='main'] .a3s, div[role='main'] .ii.gt, h2.hP")), timeout=timeout)
+
+    def current_conversation_marker(self):
+        """The element identifying the conversation on screen (None if none is shown)"""
+        for selector in CONVERSATION_MARKER_SELECTORS:
+            for element in self.driver.find_elements(By.CSS_SELECTOR, selector):
+                if element.is_displayed():
+                    return element
+        return None
+
+    def wait_for_cached_thread(self, entry, previous=None, timeout=None):
+        """Wait until a cached thread (not the conversation that was shown before navigating) is rendered
+
+        previous is current_conversation_marker() taken before the navigation; it is only needed
+        when the entry has no DOM thread id to wait for.
+        """
+        dom_thread_id = entry.get('dom_thread_id')
+        if dom_thread_id:
+            return self.wait_for_conversation_view(timeout=timeout, thread_id=dom_thread_id)
+        # No id to check against: the old view has to be swapped out before any conversation counts
+        if previous is not None and not self.wait_for('conversation', EC.staleness_of(previous),
+                                                      timeout=timeout, settle=False):
+            print("⚠️ Previous conversation still shown, forcing a full reload")
+            self.driver.refresh()
+        return self.wait_for_conversation_view(timeout=timeout)
+
+    def wait_for_compose_closed(self, timeout=None):
+        """Wait until no reply/compose editor is open any more"""
+        return self.wait_for('compose_closed', lambda driver: not driver.find_elements(
+            By.CSS_SELECTOR, "div[aria-label*='Message Body']"), timeout=timeout)
+
     def ensure_valid_window_handle(self):
         """Ensure we're on a valid browser tab, switch if current one is closed"""
         try:
@@ -79,12 +1364,12 @@ class GmailAutomationWithExcel:
         try:
             # Ensure we have a valid window first
             if not self.ensure_valid_window_handle():
-                return 'https://mail.google.com/mail/u/0/#inbox'
+                return f'{GMAIL_BASE_URL}/mail/u/0/#inbox'
             
             current_url = self.driver.current_url
             
             # Extract the Gmail base URL with account info
-            if 'mail.google.com' in current_url:
+            if GMAIL_HOST in current_url:
                 # Keep account-specific part of URL (e.g., /u/1/ for delegated profiles)
                 if '/u/' in current_url:
                     base_url = current_url.split('#')[0]  # Remove fragment
@@ -92,11 +1377,11 @@ class GmailAutomationWithExcel:
                 else:
                     return current_url.split('#')[0] + '#inbox'
             else:
-                return 'https://mail.google.com/mail/u/0/#inbox'
+                return f'{GMAIL_BASE_URL}/mail/u/0/#inbox'
                 
         except Exception as e:
             print(f"⚠️ Error getting Gmail URL: {str(e)}")
-            return 'https://mail.google.com/mail/u/0/#inbox'
+            return f'{GMAIL_BASE_URL}/mail/u/0/#inbox'
 
     def verify_gmail_loaded(self):
         """Verify that Gmail is properly loaded in the current tab"""
@@ -117,14 +1402,11 @@ class GmailAutomationWithExcel:
                 ".aAy"
             ]
             
-            for indicator in gmail_indicators:
-                try:
-                    WebDriverWait(self.driver, 15).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, indicator)))
-                    print(f"✅ Gmail loaded successfully - found {indicator}")
-                    return True
-                except:
-                    continue
+            indicator_element, indicator = self.find_with_selectors(
+                'gmail_loaded', gmail_indicators, timeout=15, clickable=False)
+            if indicator_element:
+                print(f"✅ Gmail loaded successfully - found {indicator}")
+                return True
                     
             print("⚠️ Gmail may not be fully loaded")
             return False
@@ -133,6 +1415,7 @@ class GmailAutomationWithExcel:
             print(f"⚠️ Error verifying Gmail: {str(e)}")
             return False
 
+    @timed('set_font')
     def set_email_body_font_arial(self):
         """Set the email body font to Arial"""
         try:
@@ -145,14 +1428,7 @@ class GmailAutomationWithExcel:
                 ".editable[role='textbox']"
             ]
             
-            body_element = None
-            for selector in selectors:
-                try:
-                    body_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if body_element:
-                        break
-                except:
-                    continue
+            body_element, _ = self.find_with_selectors('message_body', selectors, timeout=2, clickable=False)
             
             if not body_element:
                 print("❌ Could not find email body element for font formatting")
@@ -187,14 +1463,180 @@ class GmailAutomationWithExcel:
             return False
         
     def load_excel_data(self):
-        """Load the Excel file with contact information"""
+        """Open a streaming contact source for the sheet (rows are parsed as they are processed)"""
         try:
-            self.df = pd.read_excel(self.excel_file_path)
-            print(f"Loaded {len(self.df)} contacts from Excel file")
+            # Apply any updates left over from an interrupted run first
+            self.compact_status_journal()
+            if not os.path.exists(self.excel_file_path):
+                raise FileNotFoundError(self.excel_file_path)
+            self.load_email_templates()
+            self.contact_source = ContactSource(self.excel_file_path, extra_columns=self.extra_contact_columns)
+            print(f"Streaming contacts from {self.excel_file_path}")
             return True
         except Exception as e:
             print(f"Error loading Excel file: {str(e)}")
             return False
+
+    def iter_contacts(self, start_index=0, max_emails=None):
+        """Yield up to max_emails contacts from start_index, skipping contacts the checkpoint marks complete
+
+        Contacts are not marked in flight here; iter_prepared_contacts does that per chunk with one fsync.
+        """
+        self._contacts_exhausted = False
+        if not self.resume and self.checkpoint.recorded():
+            # A checkpoint only carries over when resuming, so the next cycle always covers everyone
+            print(f"🧹 Discarding checkpoint of an earlier run ({self.checkpoint.recorded()} contacts, --resume to continue it)")
+            self.checkpoint.clear()
+        yielded = 0
+        completed = 0
+        for contact in itertools.islice(self.contact_source, start_index, None):
+            if max_emails is not None and yielded >= max_emails:
+                break
+            contact_id = ContactCheckpoint.make_id(contact.school_name, contact.email)
+            if self.checkpoint.is_complete(contact_id):
+                completed += 1
+                continue
+            if self.checkpoint.state(contact_id) is not None:
+                print(f"🔁 Retrying {contact.school_name} ({self.checkpoint.state(contact_id)} in an earlier run)")
+            self._row_contact_ids[contact.row_index] = contact_id
+            yielded += 1
+            yield contact
+        else:
+            self._contacts_exhausted = True
+        if completed:
+            print(f"⏭️ Skipped {completed} contacts already completed in an earlier run (resumed checkpoint)")
+
+    def iter_prepared_contacts(self, start_index=0, max_emails=None, chunk_size=500):
+        """iter_contacts, with each chunk's email bodies rendered in bulk before it is handed out"""
+        contacts = self.iter_contacts(start_index, max_emails)
+        try:
+            while True:
+                chunk = list(itertools.islice(contacts, chunk_size))
+                if not chunk:
+                    return
+                self.prepare_email_bodies(chunk)
+                # One durable write per chunk instead of an fsync per row before the browser starts
+                self.checkpoint.mark_many([(self._row_contact_ids[contact.row_index], contact.row_index)
+                                           for contact in chunk], 'in_flight')
+                yield from chunk
+        finally:
+            # Runs when the stream is exhausted or abandoned, so the cache is written once per run
+            self.save_body_cache()
+
+    def load_email_templates(self):
+        """Compile the default and per-segment templates and request the sheet columns they use"""
+        template_dir = self.template_dir or os.path.join(
+            os.path.dirname(os.path.abspath(self.excel_file_path)), 'email_templates')
+        templates = {'default': EmailTemplate('default', DEFAULT_EMAIL_TEMPLATE)}
+        if os.path.isdir(template_dir):
+            for file_name in sorted(os.listdir(template_dir)):
+                if file_name.endswith('.txt'):
+                    with open(os.path.join(template_dir, file_name), 'r', encoding='utf-8') as f:
+                        name = normalize_column(file_name[:-4])
+                        templates[name] = EmailTemplate(name, f.read().rstrip('\n'))
+            print(f"📝 Loaded {len(templates) - 1} email template(s) from {template_dir}")
+        
+        core = {normalize_column(column) for column in CONTACT_COLUMNS}
+        needed = {field for template in templates.values() for field in template.fields} - core
+        if len(templates) > 1:
+            needed.add(normalize_column(self.template_column))
+        needed.add(normalize_column(self.timezone_column))
+        self.extra_contact_columns = tuple(sorted(set(self.extra_contact_columns) | needed))
+        self.email_templates = templates
+        return templates
+
+    def body_cache_path(self):
+        return self.excel_file_path + '.bodies.cache'
+
+    def load_body_cache(self):
+        if self._body_cache is None:
+            try:
+                with open(self.body_cache_path(), 'r', encoding='utf-8') as f:
+                    self._body_cache = json.load(f)
+            except (OSError, ValueError):
+                self._body_cache = {}
+            if not isinstance(self._body_cache, dict):
+                self._body_cache = {}
+            self._body_cache_dirty = False
+        return self._body_cache
+
+    def save_body_cache(self, max_cached=100000):
+        """Write the body cache if this run rendered anything new, keeping the newest max_cached entries"""
+        cache, self._body_cache = self._body_cache, None
+        if cache is None or not self._body_cache_dirty:
+            return
+        self._body_cache_dirty = False
+        if len(cache) > max_cached:
+            cache = dict(itertools.islice(cache.items(), len(cache) - max_cached, None))
+        try:
+            temp_path = self.body_cache_path() + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(temp_path, self.body_cache_path())
+        except OSError as e:
+            print(f"⚠️ Could not write email body cache: {str(e)}")
+
+    def prepare_email_bodies(self, contacts):
+        """Render bodies for many contacts in one column-wise pass, reusing bodies cached by template and row hash"""
+        if not contacts:
+            return
+        templates = self.email_templates or self.load_email_templates()
+        frame = pd.DataFrame.from_records([
+            dict({normalize_column(column): value for column, value in contact.fields.items()},
+                 row_index=contact.row_index, school_name=contact.school_name, last_name=contact.last_name,
+                 email=contact.email, cc=contact.cc)
+            for contact in contacts]).set_index('row_index')
+        
+        segment_column = normalize_column(self.template_column)
+        if segment_column in frame:
+            segments = frame[segment_column].map(normalize_column)
+            segments = segments.where(segments.isin(list(templates)), 'default')
+        else:
+            segments = pd.Series('default', index=frame.index)
+        
+        cache = self.load_body_cache()
+        hits = 0
+        for name, rows in frame.groupby(segments):
+            template = templates[name]
+            fields = [field for field in dict.fromkeys(template.fields) if field in rows]
+            if fields:
+                row_hashes = pd.util.hash_pandas_object(rows[fields].astype(str), index=False).astype(str)
+            else:
+                row_hashes = pd.Series('0', index=rows.index)
+            keys = template.hash + ':' + row_hashes
+            bodies = keys.map(cache).astype(object)
+            missing = bodies.isna()
+            hits += int((~missing).sum())
+            if missing.any():
+                rendered = template.render_frame(rows[missing])
+                bodies[missing] = rendered
+                cache.update(zip(keys[missing], rendered))
+                self._body_cache_dirty = True
+            self.rendered_bodies.update(bodies.items())
+        
+        print(f"📝 Prepared {len(frame)} email bodies ({hits} from cache)")
+
+    def email_body_for(self, contact):
+        """The prepared body for a contact (rendered on the spot if it was not prepared)"""
+        body = self.rendered_bodies.pop(contact.row_index, None)
+        return body if body is not None else self.compose_reply_body(contact.last_name)
+
+    def send_time_for(self, contact):
+        """Reserve a scheduled send time for the contact in their timezone (local if the sheet has none)"""
+        return self.send_scheduler.next_slot(contact.fields.get(normalize_column(self.timezone_column)))
+
+    def scheduled_status(self, send_at):
+        if send_at is None:
+            return 'Follow-up Email Scheduled for 10 PM'
+        return f"Follow-up Email Scheduled for {send_at.astimezone():%d/%m/%Y %I:%M %p}"
+
+    def finish_checkpoint(self):
+        """Drop the checkpoint once a run has covered the whole sheet with nothing left to retry (kept for --resume otherwise)"""
+        if self._contacts_exhausted and self.checkpoint.pending() == 0:
+            self.checkpoint.clear()
+            print("🏁 All contacts completed - checkpoint cleared")
+        else:
+            self.checkpoint.close()
     
     def setup_driver(self):
         """Initialize Chrome driver with improved options"""
@@ -208,6 +1650,11 @@ class GmailAutomationWithExcel:
         chrome_options.add_argument("--disable-web-security")
         chrome_options.add_argument("--allow-running-insecure-content")
         chrome_options.add_argument("--disable-features=VizDisplayCompositor")
+        if self.profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={os.path.abspath(self.profile_dir)}")
+        if self.headless:
+            chrome_options.add_argument("--headless=new")
+            chrome_options.add_argument("--window-size=1920,1080")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         chrome_options.add_experimental_option("prefs", {
@@ -216,12 +1663,13 @@ class GmailAutomationWithExcel:
         self.driver = webdriver.Chrome(options=chrome_options)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         self.wait = WebDriverWait(self.driver, 30)
-        self.driver.maximize_window()
-        print("Chrome driver initialized successfully")
+        if not self.headless:
+            self.driver.maximize_window()
+        print(f"Chrome driver initialized successfully{' (headless)' if self.headless else ''}")
     
     def manual_login_gmail(self):
         print("Opening Gmail...")
-        self.driver.get("https://gmail.com")
+        self.driver.get(f"{GMAIL_BASE_URL}/mail/u/0/#inbox")
         print("\n" + "="*60)
         print("MANUAL LOGIN REQUIRED")
         print("="*60)
@@ -233,23 +1681,83 @@ class GmailAutomationWithExcel:
         
         input("Press Enter after you've logged in and are on the DELEGATED profile inbox...")
         
-        # Give some time for the page to stabilize after profile selection
-        time.sleep(5)
-        
         # Ensure we have a valid window handle after profile selection
         if not self.ensure_valid_window_handle():
             print("❌ No valid browser window found!")
             return False
         
-        # Final verification
+        # Final verification (waits for Gmail to stabilize after profile selection)
         if self.verify_gmail_loaded():
             print("✅ Gmail is loaded and ready for automation!")
+            self.save_session_info()
         else:
             print("⚠️ Gmail verification failed, but continuing...")
             
         print("✅ Proceeding with email automation...")
         return True
 
+    def session_file_path(self):
+        return os.path.join(os.path.abspath(self.profile_dir), SESSION_FILE_NAME) if self.profile_dir else None
+
+    def save_session_info(self):
+        """Remember the delegated inbox URL in the persistent profile for later unattended runs"""
+        path = self.session_file_path()
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'gmail_url': self.get_current_gmail_url(), 'saved_at': datetime.now().isoformat()}, f)
+        except OSError as e:
+            print(f"⚠️ Could not save session info: {str(e)}")
+
+    def load_session_info(self):
+        path = self.session_file_path()
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_gmail_session_valid(self):
+        """Check whether the persistent profile still has a logged-in Gmail session"""
+        session = self.load_session_info()
+        if not session:
+            return False
+        try:
+            self.driver.get(session['gmail_url'])
+            self.wait_for('inbox', lambda driver: "accounts.google.com" in driver.current_url or driver.find_elements(
+                By.CSS_SELECTOR, "input[aria-label*='Search mail'], [gh='tl']"), settle=False)
+        except Exception as e:
+            print(f"⚠️ Could not open saved Gmail session: {str(e)}")
+            return False
+        if GMAIL_HOST not in self.driver.current_url:
+            return False
+        return self.verify_gmail_loaded()
+
+    def ensure_gmail_session(self):
+        """Reuse the persistent logged-in session, falling back to interactive login only when it has expired"""
+        if self.profile_dir and self.is_gmail_session_valid():
+            print("✅ Reusing saved Gmail session - no login needed")
+            return True
+        
+        if not self.headless:
+            return self.manual_login_gmail()
+        
+        print("⚠️ Saved Gmail session is missing or expired - opening a visible browser for login...")
+        self.close_driver()
+        self.headless = False
+        try:
+            self.setup_driver()
+            logged_in = self.manual_login_gmail()
+        finally:
+            self.close_driver()
+            self.headless = True
+        
+        self.setup_driver()
+        return logged_in and self.is_gmail_session_valid()
+
     def wait_for_search_results_complete(self, school_name):
         """Wait for Gmail search results to fully load using robust detection"""
         print("🔄 Waiting for Gmail search results to completely load...")
@@ -259,34 +1767,71 @@ class GmailAutomationWithExcel:
             print("❌ No valid window handle")
             return False
         
-        try:
-            WebDriverWait(self.driver, 15).until(
-                lambda driver: ("search" in driver.current_url.lower() or 
-                               "#search" in driver.current_url.lower() or
-                               "q=" in driver.current_url)
-            )
+        if self.wait_for('search_url', lambda driver: ("search" in driver.current_url.lower() or 
+                                                       "#search" in driver.current_url.lower() or
+                                                       "q=" in driver.current_url), settle=False):
             print("✅ Search URL confirmed")
-        except TimeoutException:
+        else:
             print("⚠️ Search URL not detected")
         
-        school_name_lower = school_name.lower()
-        try:
-            WebDriverWait(self.driver, 15).until(
-                lambda driver: school_name_lower in driver.page_source.lower()
-            )
-            print("✅ School name found in page source")
-        except TimeoutException:
-            print("⚠️ School name not found in page source")
-        
-        time.sleep(10)
+        # One in-page observer call instead of polling the serialized page source
+        ready = self.wait_for_dom('search_results', [("div[role='main'] tr.zA", school_name),
+                                                     ("div[role='main'] td.TC", '')])
+        if ready is None:
+            ready = self.wait_for_search_results_rows()
+        if ready:
+            print("✅ Search result list rendered")
         
         return True
 
+    def extract_conversation_payload(self, thread_id=None):
+        """Extract senders, addresses, bodies and thread id of the opened conversation in one script call"""
+        try:
+            self.wait_for_conversation_view(thread_id=thread_id)
+            payload = self.driver.execute_script(CONVERSATION_EXTRACT_SCRIPT)
+            if not payload:
+                return None
+            
+            if not payload.get('thread_id'):
+                # Fall back to the id at the end of the conversation URL (e.g. #search/query/<id>)
+                fragment = self.driver.current_url.split('#')[-1]
+                payload['thread_id'] = fragment.rsplit('/', 1)[-1] if '/' in fragment else ''
+            
+            text_parts = [payload.get('subject', '')]
+            text_parts += [f"{sender['name']} {sender['email']}" for sender in payload.get('senders', [])]
+            text_parts += payload.get('bodies', [])
+            text_parts.append(payload.get('text', ''))
+            payload['full_text'] = re.sub(r'\s+', ' ', " ".join(text_parts)).strip()
+            return payload
+            
+        except Exception as e:
+            print(f"⚠️ Single-call extraction failed: {str(e)}")
+            return None
+
+    def conversation_matches_director(self, payload, director_last_name):
+        """Check an extracted conversation payload for the director's last name"""
+        name = director_last_name.lower()
+        for sender in payload.get('senders', []):
+            if name in sender['name'].lower() or name in sender['email'].lower():
+                return True
+        return name in payload.get('full_text', '').lower()
+
+    @staticmethod
+    def payload_is_thread(payload, thread_id):
+        """True if the extracted conversation is thread_id (always True when no id was requested)"""
+        return not thread_id or thread_id in (payload.get('thread_id'), payload.get('thread_perm_id'))
+
+    @timed('conversation_content')
     def get_conversation_full_content(self):
         """Extract full conversation content including sender names from opened conversation"""
+        if self.single_roundtrip_extraction:
+            payload = self.extract_conversation_payload()
+            if payload is not None:
+                return payload['full_text']
+        
         try:
             # Wait for conversation to load
-            time.sleep(4)
+            self.wait_for_conversation_view()
             
             text_parts = []
             
@@ -346,18 +1891,15 @@ class GmailAutomationWithExcel:
             
             # Try browser back button first
             self.driver.back()
-            time.sleep(3)
             
             # Wait for search results to load
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    lambda driver: ("search" in driver.current_url.lower() or 
-                                   "q=" in driver.current_url))
+            if self.wait_for('navigation', lambda driver: ("search" in driver.current_url.lower() or 
+                                                           "q=" in driver.current_url), settle=False):
+                self.wait_for_search_results_rows()
                 print("✅ Back to search results")
-                return True
-            except TimeoutException:
+            else:
                 print("⚠️ May not be on search results page")
-                return True  # Continue anyway
+            return True  # Continue anyway
                 
         except Exception as e:
             print(f"⚠️ Error navigating back: {str(e)}")
@@ -369,7 +1911,6 @@ class GmailAutomationWithExcel:
             # Method 1: Direct click
             print("   🖱️ Attempting direct click...")
             conversation_element.click()
-            time.sleep(2)
             return True
         except Exception as e:
             print(f"   ⚠️ Direct click failed: {str(e)}")
@@ -378,7 +1919,6 @@ class GmailAutomationWithExcel:
             # Method 2: JavaScript click
             print("   🖱️ Attempting JavaScript click...")
             self.driver.execute_script("arguments[0].click();", conversation_element)
-            time.sleep(2)
             return True
         except Exception as e:
             print(f"   ⚠️ JavaScript click failed: {str(e)}")
@@ -388,7 +1928,6 @@ class GmailAutomationWithExcel:
             print("   🖱️ Attempting subject span click...")
             subject_span = conversation_element.find_element(By.CSS_SELECTOR, ".bog, .y6, span")
             subject_span.click()
-            time.sleep(2)
             return True
         except Exception as e:
             print(f"   ⚠️ Subject span click failed: {str(e)}")
@@ -398,7 +1937,6 @@ class GmailAutomationWithExcel:
             print("   🖱️ Attempting ActionChains click...")
             actions = ActionChains(self.driver)
             actions.move_to_element(conversation_element).click().perform()
-            time.sleep(2)
             return True
         except Exception as e:
             print(f"   ⚠️ ActionChains click failed: {str(e)}")
@@ -412,7 +1950,6 @@ class GmailAutomationWithExcel:
                 for td in td_elements:
                     if td.is_displayed() and td.is_enabled():
                         td.click()
-                        time.sleep(2)
                         return True
         except Exception as e:
             print(f"   ⚠️ Table row click failed: {str(e)}")
@@ -420,30 +1957,93 @@ class GmailAutomationWithExcel:
         print("   ❌ All click methods failed")
         return False
 
-    def interactive_conversation_checker(self, conversations, school_name, director_last_name):
-        """Open each conversation to check for director's last name match"""
+    def build_thread_url(self, thread_id):
+        """Build an account-preserving URL that opens a conversation by its thread id"""
+        base_url = self.get_current_gmail_url().split('#')[0]
+        return f"{base_url}#all/{thread_id}"
+
+    def open_thread_by_id(self, thread_id):
+        """Open a conversation directly by thread id and wait for its messages"""
+        try:
+            self.driver.get(self.build_thread_url(thread_id))
+        except Exception as e:
+            print(f"⚠️ Error opening thread {thread_id}: {str(e)}")
+            return False
+        return bool(self.wait_for_conversation_view(thread_id=thread_id))
+
+    def rank_candidates(self, candidates, school_name, director_last_name):
+        """Score candidates from search-result data only and return them best-first"""
+        name = director_last_name.lower()
+        school = school_name.lower()
+        
+        for candidate in candidates:
+            senders = " ".join(candidate.get('senders', [])).lower()
+            subject = candidate.get('subject', '').lower()
+            snippet = candidate.get('snippet', '').lower()
+            text = candidate.get('text', '').lower()
+            
+            score = 0
+            if name and name in senders:
+                score += 100
+            if name and name in snippet:
+                score += 40
+            if name and name in subject:
+                score += 30
+            if name and name in text:
+                score += 20
+            if school in subject:
+                score += 10
+            if school in snippet:
+                score += 5
+            
+            candidate['score'] = score
+            # The director's name already showing in the result row proves the match
+            candidate['proven'] = bool(name) and name in " ".join([senders, subject, snippet, text])
+        
+        # Stable sort keeps Gmail's recency order between equal scores
+        return sorted(candidates, key=lambda candidate: candidate['score'], reverse=True)
+
+    def interactive_conversation_checker(self, candidates, school_name, director_last_name):
+        """Open ranked candidates best-first to check for director's last name match"""
         print(f"\n🔍 INTERACTIVE CONVERSATION CHECKER")
         print(f"   🏫 School: {school_name}")
         print(f"   👤 Looking for Director: {director_last_name}")
-        print(f"   📧 Found {len(conversations)} conversations to check")
-        print(f"   🤖 Will open each conversation to find director's name...")
+        print(f"   📧 Found {len(candidates)} conversations to check")
+        print("   🤖 Will open conversations best-first to find director's name...")
         print(f"   ⚙️ Confirmation mode: {'ON' if self.require_confirmation else 'OFF (Auto-select)'}")
         print("-" * 60)
         
         # Store current URL to return to search
         search_url = self.driver.current_url
         
-        for idx, conv in enumerate(conversations):
+        for idx, candidate in enumerate(candidates):
+            conv = candidate['element']
             try:
-                print(f"\n📧 Opening conversation {idx + 1}/{len(conversations)}...")
-                
-                # Enhanced clicking method
-                if not self.enhanced_conversation_click(conv):
-                    print("❌ Failed to open conversation with all methods. Skipping...")
+                # Threads already read for another director at this school are checked without reopening
+                known = self.group_payloads.get(candidate.get('thread_id')) if self.group_payloads is not None else None
+                if known is not None and not self.conversation_matches_director(known, director_last_name):
+                    print(f"\n⏭️ Conversation {idx + 1}/{len(candidates)} already read for this school - no match for '{director_last_name}'")
                     continue
                 
-                # Wait for conversation to load and check URL change
-                time.sleep(5)
+                print(f"\n📧 Opening conversation {idx + 1}/{len(candidates)} (score: {candidate.get('score', 0)})...")
+                
+                with self.metrics.span('conversation_open'):
+                    if candidate.get('thread_id'):
+                        # Stable thread id - open by URL, no clicks on (possibly stale) search rows
+                        opened = self.open_thread_by_id(candidate['thread_id'])
+                        if not opened:
+                            print("❌ Conversation did not load from its thread URL. Skipping...")
+                    # Enhanced clicking method
+                    elif not self.enhanced_conversation_click(conv):
+                        print("❌ Failed to open conversation with all methods. Skipping...")
+                        opened = False
+                    else:
+                        # Wait for conversation to load (URL change or message content)
+                        self.wait_for('navigation', lambda driver: driver.current_url != search_url or 
+                                      driver.find_elements(By.CSS_SELECTOR, "div[role='main'] .ii, .adn, .a3s"))
+                        opened = True
+                if not opened:
+                    continue
                 
                 # Verify we're in a conversation (URL should change)
                 current_url = self.driver.current_url
@@ -458,13 +2058,37 @@ class GmailAutomationWithExcel:
                         print("❌ No conversation content detected, skipping...")
                         continue
                 
-                # Get full conversation content
-                full_content = self.get_conversation_full_content()
+                # Get full conversation content (one script call when enabled)
+                payload = None
+                if candidate.get('proven'):
+                    # Search-result row already names the director - no need to read the thread
+                    print("   ⚡ Director's name already shown in search results")
+                    self.wait_for_conversation_view()
+                    full_content = candidate['text']
+                else:
+                    if self.single_roundtrip_extraction:
+                        # Same phase as get_conversation_full_content, which this call replaces
+                        with self.metrics.span('conversation_content'):
+                            payload = self.extract_conversation_payload(thread_id=candidate.get('thread_id'))
+                        if payload is not None and not self.payload_is_thread(payload, candidate.get('thread_id')):
+                            print("⚠️ Conversation view still shows the previous thread. Skipping...")
+                            continue
+                    if payload is not None:
+                        full_content = payload['full_text']
+                        if self.group_payloads is not None and candidate.get('thread_id'):
+                            self.group_payloads[candidate['thread_id']] = payload
+                    else:
+                        full_content = self.get_conversation_full_content()
                 
                 print(f"   📄 Preview: {full_content[:200]}...")
                 
-                # Check for director's last name
-                director_found = director_last_name.lower() in full_content.lower()
+                # Check for director's last name locally on the extracted content
+                if candidate.get('proven'):
+                    director_found = True
+                elif payload is not None:
+                    director_found = self.conversation_matches_director(payload, director_last_name)
+                else:
+                    director_found = director_last_name.lower() in full_content.lower()
                 
                 if director_found:
                     print(f"✅ MATCH FOUND! Director '{director_last_name}' found in this conversation!")
@@ -474,7 +2098,7 @@ class GmailAutomationWithExcel:
                     if self.require_confirmation:
                         # Ask user for confirmation
                         while True:
-                            choice = input(f"\n🎯 Select this conversation for '{director_last_name}'? (y/n/s=show more): ").lower().strip()
+                            choice = self.ask(f"\n🎯 Select this conversation for '{director_last_name}'? (y/n/s=show more): ").lower().strip()
                             
                             if choice in ['y', 'yes']:
                                 print(f"✅ Conversation selected for {school_name}!")
@@ -495,30 +2119,32 @@ class GmailAutomationWithExcel:
                 else:
                     print(f"   ❌ No match for director '{director_last_name}' in this conversation")
                 
+                if candidate.get('thread_id'):
+                    continue  # Next candidate opens by URL - no back-navigation needed
+                
                 # Navigate back to search results
                 if not self.navigate_back_to_search():
                     print("⚠️ Could not navigate back to search results, trying direct URL...")
                     try:
                         self.driver.get(search_url)
-                        time.sleep(3)
+                        self.wait_for_search_results_rows()
                     except:
                         print("❌ Failed to return to search results")
                         break
-                    
-                # Wait a bit before next conversation
-                time.sleep(2)
                 
             except Exception as e:
                 print(f"❌ Error checking conversation {idx + 1}: {str(e)}")
+                if candidate.get('thread_id'):
+                    continue
                 # Try to navigate back
                 try:
                     self.driver.get(search_url)
-                    time.sleep(3)
+                    self.wait_for_search_results_rows()
                 except:
                     pass
                 continue
         
-        print(f"\n❌ No conversations found with director '{director_last_name}' after checking {len(conversations)} conversations")
+        print(f"\n❌ No conversations found with director '{director_last_name}' after checking {len(candidates)} conversations")
         return False
 
     def get_conversation_text_from_search_results(self, conversation_element):
@@ -550,70 +2176,24 @@ class GmailAutomationWithExcel:
         
         return combined_text
 
-    def search_school_and_select(self, school_name, auto_select=True):
-        """Enhanced search with interactive conversation checking"""
-        print(f"Searching for: {school_name}")
-        
-        # Ensure valid window handle before proceeding
-        if not self.ensure_valid_window_handle():
-            print("❌ No valid browser window")
-            return False
-        
-        # Use current Gmail URL to preserve delegated profile
-        gmail_url = self.get_current_gmail_url()
-        if gmail_url is None:
-            print("❌ Could not get Gmail URL")
-            return False
-            
-        print(f"📧 Navigating to: {gmail_url}")
-        
+    @timed('candidate_discovery')
+    def discover_candidates(self, school_name, limit=15):
+        """Find deduplicated search-result candidates with thread ids, snippets and senders in one call"""
         try:
-            self.driver.get(gmail_url)
-            time.sleep(5)
+            candidates = self.driver.execute_script(CANDIDATE_DISCOVERY_SCRIPT, school_name.lower(), limit)
         except Exception as e:
-            print(f"❌ Error navigating to Gmail: {str(e)}")
-            return False
-        
-        search_selectors = [
-            "input[aria-label*='Search mail']",
-            "input[placeholder*='Search']",
-            "[gh='tl'] input"
-        ]
-        
-        search_box = None
-        for selector in search_selectors:
-            try:
-                search_box = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                print(f"Found search box with selector: {selector}")
-                break
-            except:
-                continue
-                
-        if not search_box:
-            print("❌ Could not find search box. Please search manually.")
-            input("Please search for the school manually and select the conversation, then press Enter...")
-            return True
+            print(f"⚠️ In-page candidate discovery failed: {str(e)}")
+            return None
         
-        search_box.click()
-        time.sleep(1)
-        search_box.clear()
-        search_box.send_keys(school_name)
-        search_box.send_keys(Keys.ENTER)
-        
-        self.wait_for_search_results_complete(school_name)
-        
-        print("🔍 Looking for conversations containing the school name...")
-        
-        page_text = self.driver.find_element(By.TAG_NAME, "body").text.lower()
-        if school_name.lower() not in page_text:
-            print("❌ School name not found anywhere on the page!")
-            print("This suggests the search didn't return any results.")
-            input("Please manually select a conversation if one exists, then press Enter...")
-            return True
-        
-        print("✅ School name found on the page, looking for clickable conversations...")
-        
-        # Enhanced conversation detection with multiple selectors
+        for index, candidate in enumerate(candidates):
+            candidate['index'] = index
+            candidate['score'] = 0
+            print(f"Found candidate: {candidate['text'][:100]}...")
+        return candidates
+
+    @timed('candidate_discovery')
+    def discover_candidates_legacy(self, school_name):
+        """Find candidates with per-element WebDriver queries (fallback for discover_candidates)"""
         potential_conversations = []
         
         # Method 1: Look for table rows with jsaction
@@ -659,34 +2239,195 @@ class GmailAutomationWithExcel:
             print(f"XPath search failed: {e}")
         
         # Remove duplicates
-        unique_conversations = []
+        candidates = []
+        seen_ids = set()
         for conv in potential_conversations:
-            if conv not in unique_conversations:
-                unique_conversations.append(conv)
+            if conv.id in seen_ids:
+                continue
+            seen_ids.add(conv.id)
+            candidates.append({
+                'index': len(candidates),
+                'element': conv,
+                'thread_id': '',
+                'senders': [],
+                'subject': '',
+                'snippet': '',
+                'text': self.get_conversation_text_from_search_results(conv),
+                'score': 0
+            })
+        return candidates
+
+    def build_search_url(self, query):
+        """Build an account-preserving #search/<query> URL from the current Gmail URL"""
+        base_url = self.get_current_gmail_url().split('#')[0]
+        return f"{base_url}#search/{quote_plus(query)}"
+
+    def search_via_url(self, school_name):
+        """Run a Gmail search by navigating to its URL instead of typing into the search box"""
+        search_url = self.build_search_url(school_name)
+        print(f"📧 Navigating to search: {search_url}")
+        try:
+            self.driver.get(search_url)
+            return True
+        except Exception as e:
+            print(f"⚠️ URL search failed, falling back to the search box: {str(e)}")
+            return False
+
+    def open_cached_thread(self, school_name, director_last_name):
+        """Open the thread used last time for this contact, invalidating it if it no longer loads"""
+        if self.thread_cache is None:
+            return False
+        entry = self.thread_cache.get(school_name, director_last_name)
+        if not entry:
+            return False
+        
+        print(f"⚡ Using cached thread for {school_name}: {entry['url']}")
+        try:
+            previous = self.current_conversation_marker()
+            self.driver.get(entry['url'])
+            if self.wait_for_cached_thread(entry, previous):
+                print("✅ Cached thread loaded - skipping search")
+                return True
+        except Exception as e:
+            print(f"⚠️ Error opening cached thread: {str(e)}")
+        
+        print("⚠️ Cached thread no longer loads, removing it from the index")
+        self.thread_cache.invalidate(school_name, director_last_name)
+        return False
+
+    def remember_selected_thread(self, school_name, director_last_name):
+        """Store the currently opened thread in the persistent index"""
+        if self.thread_cache is None or not director_last_name:
+            return
+        try:
+            url = self.driver.current_url
+            fragment = url.split('#')[-1] if '#' in url else ''
+            if '/' not in fragment:
+                return  # Not a conversation URL
+            # The URL token (FMfcg... on Gmail) never appears in the DOM, so keep the view's own id to wait on
+            dom_thread_id = self.driver.execute_script(THREAD_DOM_ID_SCRIPT) or ''
+            self.thread_cache.put(school_name, director_last_name, dom_thread_id, url)
+        except Exception as e:
+            print(f"⚠️ Could not update thread index: {str(e)}")
+
+    @timed('search_school_and_select')
+    def search_school_and_select(self, school_name, auto_select=True, director_last_name=None, prefetched=False):
+        """Enhanced search with interactive conversation checking
+        
+        director_last_name defaults to current_director_name; prefetched=True means the
+        search URL is already loading in the current tab (pipelined mode).
+        """
+        print(f"Searching for: {school_name}")
+        
+        # Ensure valid window handle before proceeding
+        if not self.ensure_valid_window_handle():
+            print("❌ No valid browser window")
+            return False
+        
+        if director_last_name is None:
+            director_last_name = getattr(self, 'current_director_name', '')
+        
+        # Repeat follow-ups go straight to the thread used last time
+        if not prefetched and director_last_name and self.open_cached_thread(school_name, director_last_name):
+            return True
+        
+        if not self.run_school_search(school_name, prefetched=prefetched):
+            return self.manual_fallback("Please search for the school manually and select the conversation, then press Enter...")
+        
+        candidates = self.find_school_candidates(school_name)
+        if not candidates:
+            return self.manual_fallback("Please manually select a conversation if one exists, then press Enter...")
+        
+        return self.select_conversation(candidates, school_name, director_last_name, auto_select=auto_select)
+
+    def run_school_search(self, school_name, prefetched=False):
+        """Run the Gmail search for a school and wait for the results; False if it could not be run"""
+        # Go straight to the search results URL (typing into the search box as fallback)
+        searched = prefetched or (self.url_search and self.search_via_url(school_name))
+        
+        if not searched:
+            # Use current Gmail URL to preserve delegated profile
+            gmail_url = self.get_current_gmail_url()
+            if gmail_url is None:
+                print("❌ Could not get Gmail URL")
+                return False
+            
+            print(f"📧 Navigating to: {gmail_url}")
+        
+            try:
+                self.driver.get(gmail_url)
+                self.wait_for('inbox', lambda driver: driver.find_elements(
+                    By.CSS_SELECTOR, "input[aria-label*='Search mail'], input[placeholder*='Search'], [gh='tl'] input"))
+            except Exception as e:
+                print(f"❌ Error navigating to Gmail: {str(e)}")
+                return False
+        
+            search_selectors = [
+                "input[aria-label*='Search mail']",
+                "input[placeholder*='Search']",
+                "[gh='tl'] input"
+            ]
+        
+            search_box, selector = self.find_with_selectors('search_box', search_selectors, timeout=30)
+            if search_box:
+                print(f"Found search box with selector: {selector}")
+                
+            if not search_box:
+                print("❌ Could not find search box. Please search manually.")
+                return False
+        
+            search_box.click()
+            time.sleep(1)
+            search_box.clear()
+            search_box.send_keys(school_name)
+            search_box.send_keys(Keys.ENTER)
+        
+        self.wait_for_search_results_complete(school_name)
+        return True
+
+    def find_school_candidates(self, school_name):
+        """Collect up to 15 conversation candidates for the school from the loaded search results"""
+        print("🔍 Looking for conversations containing the school name...")
+        
+        if not self.results_mention(school_name):
+            print("❌ School name not found anywhere on the page!")
+            print("This suggests the search didn't return any results.")
+            return []
+        
+        print("✅ School name found on the page, looking for clickable conversations...")
+        
+        # Single in-page query returning deduplicated candidates (legacy multi-method scan as fallback)
+        candidates = self.discover_candidates(school_name)
+        if candidates is None:
+            candidates = self.discover_candidates_legacy(school_name)
         
         # UPDATED: Increased limit from 5 to 15
-        conversations = unique_conversations[:15]  # Now checks up to 15 conversations
+        candidates = candidates[:15]  # Now checks up to 15 conversations
         
-        if not conversations:
+        if not candidates:
             print(f"⚠️ No conversations found containing '{school_name}'")
             print("The search may not have returned any results, or results are in an unexpected format.")
-            input("Please manually select a conversation if one exists, then press Enter...")
-            return True
+        return candidates
+
+    def select_conversation(self, candidates, school_name, director_last_name, auto_select=True):
+        """Rank candidates, check them for the director and fall back to manual selection"""
+        # Pre-rank from search-result data so the likeliest conversation is opened first
+        candidates = self.rank_candidates(candidates, school_name, director_last_name)
+        conversations = [candidate['element'] for candidate in candidates]
         
         print(f"✅ Found {len(conversations)} conversations to analyze (limit: 15)")
         
         # Use interactive conversation checker
-        director_last_name = getattr(self, 'current_director_name', '')
-        
         if auto_select and director_last_name:
             print(f"\n🤖 SMART CONVERSATION SELECTION")
-            print(f"   Since search results don't show sender names, I'll open each")
-            print(f"   conversation to check for Director '{director_last_name}'")
+            print("   Opening conversations best-first by search-result score")
+            print(f"   to check for Director '{director_last_name}'")
             print(f"   ⚙️ Confirmation: {'REQUIRED' if self.require_confirmation else 'AUTO-SELECT'}")
             print(f"   🔢 Checking up to {len(conversations)} conversations")
             
             # Use interactive checker
-            if self.interactive_conversation_checker(conversations, school_name, director_last_name):
+            if self.interactive_conversation_checker(candidates, school_name, director_last_name):
+                self.remember_selected_thread(school_name, director_last_name)
                 return True
             else:
                 print(f"\n⚠️ No conversations found with Director '{director_last_name}'")
@@ -697,35 +2438,41 @@ class GmailAutomationWithExcel:
         print("-" * 80)
         
         conversation_data = []
-        for i, conv in enumerate(conversations):
-            try:
-                conv_text = self.get_conversation_text_from_search_results(conv)
-                conversation_data.append({
-                    'index': i,
-                    'element': conv,
-                    'text': conv_text[:200],
-                    'score': 0
-                })
-                
-                print(f"{i+1}. Preview: {conv_text[:200].replace(chr(10), ' ')}")
-                print("-" * 40)
-                
-            except Exception as e:
-                print(f"Error analyzing conversation {i+1}: {str(e)}")
-                continue
+        for i, candidate in enumerate(candidates):
+            conv_text = candidate['text']
+            conversation_data.append({
+                'index': i,
+                'element': candidate['element'],
+                'text': conv_text[:200],
+                'score': candidate['score']
+            })
+            
+            print(f"{i+1}. Preview: {conv_text[:200].replace(chr(10), ' ')}")
+            print("-" * 40)
+        
+        if self.unattended:
+            print("⏭️ Unattended mode - skipping manual selection")
+            return False
         
         print("\n📋 Manual selection:")
         while True:
             try:
-                choice = input(f"\nSelect conversation (1-{len(conversations)}) or 0 to skip: ")
+                choice = self.ask(f"\nSelect conversation (1-{len(conversations)}) or 0 to skip: ")
                 choice_num = int(choice)
                 if choice_num == 0:
                     print("⏭️ Skipping this school")
                     return False
                 elif 1 <= choice_num <= len(conversations):
-                    if self.enhanced_conversation_click(conversations[choice_num - 1]):
-                        time.sleep(3)
+                    candidate = candidates[choice_num - 1]
+                    if candidate.get('thread_id'):
+                        opened = self.open_thread_by_id(candidate['thread_id'])
+                    else:
+                        opened = self.enhanced_conversation_click(candidate['element'])
+                        if opened:
+                            self.wait_for_conversation_view()
+                    if opened:
                         print(f"✅ Selected conversation {choice_num}")
+                        self.remember_selected_thread(school_name, director_last_name)
                         return True
                     else:
                         print(f"❌ Could not click conversation {choice_num}")
@@ -734,9 +2481,29 @@ class GmailAutomationWithExcel:
                     print(f"Please enter a number between 0 and {len(conversations)}")
             except Exception:
                 print("Just select the conversation manually if needed, then press Enter...")
-                input("Press Enter when ready to continue...")
-                return True
+                return self.manual_fallback("Press Enter when ready to continue...")
+
+    def format_body_html(self, text):
+        """Plain text -> Gmail-style HTML lines in Arial 11px"""
+        lines = "".join(f"<div>{html_escape(line.strip())}</div>" if line.strip() else "<div><br></div>"
+                        for line in text.split("\n"))
+        return f'<div style="font-family: Arial, sans-serif; font-size: 11px;">{lines}</div>'
+
+    @timed('insert_body')
+    def insert_formatted_body(self, element, text):
+        """Insert the Arial-formatted body in one editor operation, keeping the signature; True once verified"""
+        try:
+            result = self.driver.execute_script(COMPOSE_INSERT_SCRIPT, element, self.format_body_html(text), text)
+        except Exception as e:
+            print(f"⚠️ One-shot body insertion failed: {str(e)}")
+            return False
+        if not result or not result.get('verified'):
+            print("⚠️ Inserted body could not be verified")
+            return False
+        print(f"✅ Email body inserted in Arial{' above the signature' if result.get('signature') else ''}")
+        return True
 
+    @timed('insert_text')
     def clear_and_insert_text(self, element, text):
         """Clear all existing content and insert only new text with emoji support"""
         try:
@@ -774,9 +2541,17 @@ class GmailAutomationWithExcel:
             return False
 
     def schedule_email_for_10pm(self):
-        """Use Gmail's native Schedule Send feature following the exact flow"""
+        """Schedule the open reply for 10:00 PM today"""
+        return self.schedule_email(datetime.now().replace(hour=22, minute=0, second=0, microsecond=0).astimezone())
+
+    @timed('schedule_send')
+    def schedule_email(self, send_at):
+        """Use Gmail's native Schedule Send feature for send_at (shown in this machine's local time)"""
+        local_send_at = send_at.astimezone()
+        send_date = local_send_at.strftime('%b %d, %Y').replace(' 0', ' ')
+        send_time = local_send_at.strftime('%I:%M %p').lstrip('0')
         try:
-            print("\n⏰ Using Gmail's Schedule Send for 10:00 PM today...")
+            print(f"\n⏰ Using Gmail's Schedule Send for {send_date} {send_time}...")
             
             print("📍 Step 1: Looking for Send button dropdown...")
             
@@ -788,57 +2563,44 @@ class GmailAutomationWithExcel:
                 "div[role='button'][data-tooltip*='send options']"
             ]
             
-            send_dropdown = None
-            for selector in send_dropdown_selectors:
-                try:
-                    send_dropdown = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"✅ Found send dropdown: {selector}")
-                    break
-                except:
-                    continue
+            send_dropdown, selector = self.find_with_selectors('send_dropdown', send_dropdown_selectors, timeout=10)
+            if send_dropdown:
+                print(f"✅ Found send dropdown: {selector}")
             
             if not send_dropdown:
                 print("❌ Could not find send dropdown button")
                 return False
             
             if self.safe_click(send_dropdown):
-                time.sleep(2)
                 print("✅ Clicked send dropdown")
             else:
                 print("❌ Could not click send dropdown")
                 return False
             
+            menu = self.wait_for_dom('send_menu', [("[role='menu']", 'schedule send')])
+            if menu is None:
+                self.wait_for('send_menu', lambda driver: driver.find_elements(
+                    By.XPATH, "//*[@role='menu'][contains(., 'Schedule send')]"))
+            
             print("📍 Step 2: Clicking 'Schedule send' from menu...")
             
             schedule_selectors = [
                 "//div[contains(text(), 'Schedule send')]",
                 "//span[contains(text(), 'Schedule send')]",
-                "div[role='menuitem']:contains('Schedule send')",
-                ".T-I-atl:contains('Schedule send')",
+                "//div[@role='menuitem'][contains(., 'Schedule send')]",
+                "//*[contains(@class, 'T-I-atl')][contains(., 'Schedule send')]",
                 "[data-tooltip='Schedule send']"
             ]
             
-            schedule_button = None
-            for selector in schedule_selectors:
-                try:
-                    if selector.startswith("//"):
-                        schedule_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector)))
-                    else:
-                        schedule_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"✅ Found Schedule send button: {selector}")
-                    break
-                except:
-                    continue
+            schedule_button, selector = self.find_with_selectors('schedule_button', schedule_selectors, timeout=10)
+            if schedule_button:
+                print(f"✅ Found Schedule send button: {selector}")
             
             if not schedule_button:
                 print("❌ Could not find Schedule send button")
                 return False
             
             if self.safe_click(schedule_button):
-                time.sleep(3)
                 print("✅ Clicked Schedule send")
             else:
                 print("❌ Could not click Schedule send")
@@ -846,33 +2608,26 @@ class GmailAutomationWithExcel:
             
             print("📍 Step 3: In schedule options dialog, clicking 'Pick date & time'...")
             
-            time.sleep(3)
+            dialog = self.wait_for_dom('schedule_dialog', [("[role='dialog']", 'pick date'),
+                                                           ("[role='alertdialog']", 'pick date')])
+            if dialog is None:
+                self.wait_for('schedule_dialog', lambda driver: driver.find_elements(
+                    By.XPATH, "//*[@role='dialog' or @role='alertdialog'][contains(., 'Pick date')]"))
             
             pick_date_time_selectors = [
                 "//div[contains(text(), 'Pick date & time')]",
                 "//span[contains(text(), 'Pick date & time')]",
-                "div[role='button']:contains('Pick date & time')",
-                ".T-I-atl:contains('Pick date & time')",
+                "//div[@role='button'][contains(., 'Pick date & time')]",
+                "//*[contains(@class, 'T-I-atl')][contains(., 'Pick date & time')]",
                 "[aria-label*='Pick date']"
             ]
             
-            pick_date_time_button = None
-            for selector in pick_date_time_selectors:
-                try:
-                    if selector.startswith("//"):
-                        pick_date_time_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector)))
-                    else:
-                        pick_date_time_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"✅ Found 'Pick date & time': {selector}")
-                    break
-                except:
-                    continue
+            pick_date_time_button, selector = self.find_with_selectors('pick_date_time_button', pick_date_time_selectors, timeout=10)
+            if pick_date_time_button:
+                print(f"✅ Found 'Pick date & time': {selector}")
             
             if pick_date_time_button:
                 if self.safe_click(pick_date_time_button):
-                    time.sleep(3)
                     print("✅ Clicked 'Pick date & time'")
                 else:
                     print("❌ Could not click 'Pick date & time'")
@@ -880,117 +2635,45 @@ class GmailAutomationWithExcel:
             else:
                 print("⚠️ Could not find 'Pick date & time', proceeding to date/time inputs...")
             
-            print("📍 Step 4: Setting date to today and time to 10:00 PM...")
-            
-            today_date = datetime.now().strftime('%b %d, %Y')
-            print(f"Setting date to: {today_date}")
+            print(f"📍 Step 4: Setting date to {send_date} and time to {send_time}...")
             
-            date_input_selectors = [
-                "input[value*='Aug 25, 2025']",
-                "input[aria-label='Date']",
-                "input[placeholder*='date']",
-                "input[type='text'][value*='2025']",
-                "//input[contains(@value, 'Aug 25')]",
-                "//input[contains(@value, '2025')]"
-            ]
+            # Inputs are located inside the dialog by role and label, not by their current values
+            self.wait_for_dom('schedule_dialog', [("[role='dialog'] input, [role='alertdialog'] input", '')])
+            inputs = self.driver.execute_script(SCHEDULE_INPUTS_SCRIPT) or [None, None]
             
-            date_input = None
-            for selector in date_input_selectors:
-                try:
-                    if selector.startswith("//"):
-                        date_input = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector)))
-                    else:
-                        date_input = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"✅ Found date input: {selector}")
-                    break
-                except:
+            for field, element, value in (('date', inputs[0], send_date), ('time', inputs[1], send_time)):
+                if element is None:
+                    print(f"⚠️ Could not find {field} input field")
                     continue
-            
-            if date_input:
                 try:
-                    self.safe_click(date_input)
-                    time.sleep(0.5)
+                    self.safe_click(element)
                     ActionChains(self.driver).key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL).perform()
-                    time.sleep(0.5)
-                    ActionChains(self.driver).send_keys(today_date).perform()
-                    print(f"✅ Set date to: {today_date}")
-                    time.sleep(1)
+                    ActionChains(self.driver).send_keys(value).perform()
+                    print(f"✅ Set {field} to: {element.get_attribute('value') or value}")
                 except Exception as e:
-                    print(f"⚠️ Could not set date: {str(e)}")
-            else:
-                print("⚠️ Could not find date input field")
-            
-            print("Setting time to: 10:00 PM")
-            
-            time_input_selectors = [
-                "input[value*='10:00 PM']",
-                "input[aria-label='Time']",
-                "input[placeholder*='time']",
-                "input[type='text'][value*='PM']",
-                "//input[contains(@value, '10:00')]",
-                "//input[contains(@value, 'PM')]"
-            ]
-            
-            time_input = None
-            for selector in time_input_selectors:
-                try:
-                    if selector.startswith("//"):
-                        time_input = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector)))
-                    else:
-                        time_input = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"✅ Found time input: {selector}")
-                    break
-                except:
-                    continue
-            
-            if time_input:
-                try:
-                    self.safe_click(time_input)
-                    time.sleep(0.5)
-                    ActionChains(self.driver).key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL).perform()
-                    time.sleep(0.5)
-                    ActionChains(self.driver).send_keys("10:00 PM").perform()
-                    print("✅ Set time to: 10:00 PM")
-                    time.sleep(1)
-                except Exception as e:
-                    print(f"⚠️ Could not set time: {str(e)}")
-            else:
-                print("⚠️ Could not find time input field")
+                    print(f"⚠️ Could not set {field}: {str(e)}")
             
             print("📍 Step 5: Clicking final 'Schedule send' to confirm...")
             
-            time.sleep(2)
-            
             final_schedule_selectors = [
                 "//span[text()='Schedule send']",
                 "//button[contains(text(), 'Schedule send')]", 
-                "button:contains('Schedule send')",
+                "//button[contains(., 'Schedule send')]",
                 "[aria-label*='Schedule send'][role='button']",
-                ".T-I-atl:contains('Schedule send')"
+                "//*[contains(@class, 'T-I-atl')][contains(., 'Schedule send')]"
             ]
             
-            final_button = None
-            for selector in final_schedule_selectors:
-                try:
-                    if selector.startswith("//"):
-                        final_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector)))
-                    else:
-                        final_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"✅ Found final Schedule send button: {selector}")
-                    break
-                except:
-                    continue
+            final_button, selector = self.find_with_selectors('final_button', final_schedule_selectors, timeout=10)
+            if final_button:
+                print(f"✅ Found final Schedule send button: {selector}")
             
             if final_button:
                 if self.safe_click(final_button):
-                    time.sleep(3)
-                    print("🎉 Email successfully scheduled for 10:00 PM today!")
+                    # Gmail closes the reply once the send is scheduled
+                    if not self.wait_for_compose_closed():
+                        print("❌ Reply is still open after confirming the schedule")
+                        return False
+                    print(f"🎉 Email successfully scheduled for {send_date} {send_time}!")
                     return True
                 else:
                     print("❌ Could not click final Schedule send button")
@@ -1003,8 +2686,14 @@ class GmailAutomationWithExcel:
             print(f"❌ Error in schedule process: {str(e)}")
             return False
 
-    def reply_to_message(self, director_last_name, cc_emails=None, schedule_send=True):
-        """Reply to the current message thread with optional scheduling"""
+    def compose_reply_body(self, director_last_name):
+        """Default-template follow-up body for contacts whose body was not prepared in bulk"""
+        templates = self.email_templates or {'default': EmailTemplate('default', DEFAULT_EMAIL_TEMPLATE)}
+        return templates['default'].render({'last_name': director_last_name})
+
+    @timed('reply')
+    def reply_to_message(self, director_last_name, cc_emails=None, schedule_send=True, email_body=None, send_at=None):
+        """Reply to the current message thread, scheduled for send_at (10 PM today if not given) or sent now"""
         try:
             print("Looking for reply button...")
             reply_selectors = [
@@ -1013,27 +2702,26 @@ class GmailAutomationWithExcel:
                 ".ams.bkH",
                 "[title*='Reply']"
             ]
-            reply_button = None
-            for selector in reply_selectors:
-                try:
-                    reply_button = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"Found reply button with selector: {selector}")
-                    break
-                except:
-                    continue
+            reply_button, selector = self.find_with_selectors('reply_button', reply_selectors, timeout=30)
+            if reply_button:
+                print(f"Found reply button with selector: {selector}")
             if not reply_button:
                 print("❌ Could not find reply button automatically.")
-                input("Please click the Reply button manually, then press Enter...")
+                if not self.manual_fallback("Please click the Reply button manually, then press Enter..."):
+                    return False
             else:
                 reply_button.click()
-                time.sleep(3)
+                self.wait_for('compose_open', lambda driver: driver.find_elements(
+                    By.CSS_SELECTOR, "div[aria-label*='Message Body'], div[role='textbox'][aria-label*='Message']"))
             
             if cc_emails and cc_emails.strip():
                 print(f"\n📧 Adding CC: {cc_emails}")
                 try:
                     actions = ActionChains(self.driver)
                     actions.key_down(Keys.CONTROL).key_down(Keys.SHIFT).send_keys('c').key_up(Keys.SHIFT).key_up(Keys.CONTROL).perform()
-                    time.sleep(2)
+                    # The shortcut opens the Cc row and focuses its input
+                    self.wait_for('cc_field', lambda driver: driver.switch_to.active_element.tag_name.lower() in
+                                  ('input', 'textarea'), settle=False)
                     
                     try:
                         active_element = self.driver.switch_to.active_element
@@ -1046,15 +2734,9 @@ class GmailAutomationWithExcel:
                     print(f"Error with CC: {str(e)}")
             
             print("\n📝 Now filling email body...")
-            time.sleep(1)
-            
-            # NEW: Set font to Arial before inserting text
-            self.set_email_body_font_arial()
             
-            email_body = f"""Hi Director {director_last_name},
-            
-test sending hello world
-maron"""
+            if email_body is None:
+                email_body = self.compose_reply_body(director_last_name)
             
             body_selectors = [
                 "div[aria-label*='Message Body']",
@@ -1064,17 +2746,14 @@ maron"""
                 ".editable[role='textbox']"
             ]
             
-            message_body = None
-            for selector in body_selectors:
-                try:
-                    message_body = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                    print(f"Found message body with selector: {selector}")
-                    break
-                except:
-                    continue
-            
+            message_body, selector = self.find_with_selectors('message_body', body_selectors, timeout=30)
             if message_body:
+                print(f"Found message body with selector: {selector}")
+            
+            if message_body and not self.insert_formatted_body(message_body, email_body):
+                # Keystroke fallback: separate font pass, then type the body
                 try:
+                    self.set_email_body_font_arial()
                     if self.clear_and_insert_text(message_body, email_body):
                         print("✅ Email body replaced successfully with Arial font!")
                     else:
@@ -1083,10 +2762,11 @@ maron"""
                     print(f"Error filling body: {str(e)}")
             
             if schedule_send:
-                return self.schedule_email_for_10pm()
+                if send_at is None:
+                    return self.schedule_email_for_10pm()
+                return self.schedule_email(send_at)
             else:
                 print("\n📤 Now attempting to send email immediately...")
-                time.sleep(2)
                 
                 send_selectors = [
                     "[aria-label*='Send '][role='button']",
@@ -1095,20 +2775,17 @@ maron"""
                     "[role='button'][aria-label*='Send']"
                 ]
                 
-                send_button = None
-                for selector in send_selectors:
-                    try:
-                        send_button = WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                        print(f"Found send button with selector: {selector}")
-                        break
-                    except:
-                        continue
+                send_button, selector = self.find_with_selectors('send_button', send_selectors, timeout=5)
+                if send_button:
+                    print(f"Found send button with selector: {selector}")
                 
                 if send_button:
                     try:
                         send_button.click()
-                        time.sleep(3)
-                        print("✅ Email sent immediately!")
+                        if self.wait_for_compose_closed():
+                            print("✅ Email sent immediately!")
+                        else:
+                            print("⚠️ Reply is still open after clicking Send")
                     except Exception as e:
                         print(f"Error clicking send: {str(e)}")
                 else:
@@ -1124,122 +2801,912 @@ maron"""
         print("Send process already handled in reply_to_message")
         return True
 
+    @timed('status_update')
     def update_excel_status(self, row_index, status, success_status):
-        """Update Excel with proper date formatting and 14-day gap"""
+        """Journal a status update with proper dates and 14-day gap (compacted into Excel in batches)"""
         today = datetime.now()
+        next_due_date = today + timedelta(days=14)
         
-        self.df.loc[row_index, 'Date of Last Action'] = today
-        self.df.loc[row_index, 'succcessful/Failed'] = success_status
-        self.df.loc[row_index, 'Status'] = status
+        values = {
+            'Date of Last Action': today,
+            'succcessful/Failed': success_status,
+            'Status': status,
+            'Next Action Due Date': next_due_date,
+            'Next action': 'Follow-up Email'
+        }
         
-        next_due_date = today + timedelta(days=14)
-        self.df.loc[row_index, 'Next Action Due Date'] = next_due_date
-        self.df.loc[row_index, 'Next action'] = 'Follow-up Email'
+        if self.df is not None:
+            self.apply_status_updates(self.df, {row_index: values})
+        
+        self.status_journal.append({
+            'row': int(row_index),
+            'values': {column: (value.isoformat() if isinstance(value, datetime) else value)
+                       for column, value in values.items()}
+        })
+        self._journal_pending += 1
+        
+        # Only mark the contact finished once its sheet update is durable
+        contact_id = self._row_contact_ids.pop(row_index, None)
+        if contact_id is not None:
+            self.checkpoint.mark(contact_id, ContactCheckpoint.state_for(success_status), int(row_index))
+        
+        print("✅ Journaled status update")
+        print(f"   Date of Last Action: {today.strftime('%d/%m/%Y')}")
+        print(f"   Next Action Due Date: {next_due_date.strftime('%d/%m/%Y')} (14 days from today)")
+        print(f"   Status: {status}")
+        print(f"   Success/Failed: {success_status}")
+        
+        if self.journal_checkpoint_every and self._journal_pending >= self.journal_checkpoint_every:
+            self.compact_status_journal()
+        self.metrics.maybe_export()
+
+    @staticmethod
+    def apply_status_updates(df, updates):
+        """Write {row: {column: value}} into df, widening the target columns to object so any value fits"""
+        columns = {column for row_values in updates.values() for column in row_values}
+        for column in columns:
+            if column in df and df[column].dtype != object:
+                # Empty columns are read back as float64, which rejects datetimes and text
+                df[column] = df[column].astype(object)
+        for row_index, row_values in updates.items():
+            for column, value in row_values.items():
+                df.loc[row_index, column] = value
+
+    def update_csv_rows(self, updates):
+        """Write {row: {column: value}} into the CSV sheet cell by cell, leaving every other cell's text as it was
+
+        Rows are counted like ContactSource counts them (blank lines included), so row indexes line up.
+        """
+        with open(self.excel_file_path, 'rb') as f:
+            head = f.read(1 << 16)
+        encoding = 'utf-8-sig' if head.startswith(b'\xef\xbb\xbf') else 'utf-8'
+        line_terminator = '\r\n' if b'\r\n' in head or b'\n' not in head else '\n'
+        
+        with open(self.excel_file_path, 'r', encoding=encoding, newline='') as f:
+            rows = list(csv.reader(f))
+        if not rows:
+            raise ValueError("CSV contact sheet has no header row")
+        header = rows[0]
+        positions = {column: index for index, column in enumerate(header)}
+        
+        for row_index, row_values in updates.items():
+            if row_index + 1 >= len(rows):
+                print(f"⚠️ Row {row_index} is not in the CSV sheet any more, skipping its status update")
+                continue
+            row = rows[row_index + 1]
+            for column, value in row_values.items():
+                if column not in positions:
+                    positions[column] = len(header)
+                    header.append(column)
+                if len(row) <= positions[column]:
+                    row.extend([''] * (positions[column] + 1 - len(row)))
+                # CSV keeps dates as dd/mm/yyyy text, like the rows written before
+                row[positions[column]] = (value.strftime('%d/%m/%Y') if isinstance(value, datetime)
+                                          else '' if value is None else str(value))
+        
+        temp_path = self.excel_file_path + '.tmp'
+        with open(temp_path, 'w', encoding=encoding, newline='') as f:
+            csv.writer(f, lineterminator=line_terminator).writerows(rows)
+        os.replace(temp_path, self.excel_file_path)
+
+    def compact_status_journal(self):
+        """Apply all journaled status updates to the workbook in one batched pass"""
+        entries = self.status_journal.read()
+        if not entries:
+            self._journal_pending = 0
+            return True
+        
+        # Later entries for the same row win
+        updates = {}
+        for entry in entries:
+            row_values = updates.setdefault(int(entry['row']), {})
+            for column, value in entry['values'].items():
+                if column in STATUS_DATE_COLUMNS and isinstance(value, str):
+                    try:
+                        value = datetime.fromisoformat(value)
+                    except ValueError:
+                        pass
+                row_values[column] = value
+        
+        print(f"💾 Compacting {len(entries)} journaled update(s) for {len(updates)} row(s) into Excel...")
+        
+        extension = os.path.splitext(self.excel_file_path)[1].lower()
+        if extension in ('.csv', '.parquet'):
+            try:
+                if extension == '.csv':
+                    self.update_csv_rows(updates)
+                else:
+                    df = pd.read_parquet(self.excel_file_path)
+                    self.apply_status_updates(df, updates)
+                    df.to_parquet(self.excel_file_path, index=False)
+                print(f"✅ Updated {extension[1:].upper()} contact sheet")
+            except Exception as e:
+                print(f"❌ Could not compact status journal, keeping it for next run: {str(e)}")
+                return False
+            self.status_journal.clear()
+            self._journal_pending = 0
+            return True
         
         try:
-            with pd.ExcelWriter(self.excel_file_path, 
-                               engine='xlsxwriter',
-                               date_format='DD/MM/YYYY',
-                               datetime_format='DD/MM/YYYY HH:MM:SS') as writer:
-                
-                self.df.to_excel(writer, sheet_name='Sheet1', index=False)
-                
-                workbook = writer.book
-                worksheet = writer.sheets['Sheet1']
-                date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
-                worksheet.set_column('I:J', 12, date_format)
+            from openpyxl import load_workbook
+            
+            # Edit cells in place so other sheets and formatting survive
+            workbook = load_workbook(self.excel_file_path)
+            worksheet = workbook.worksheets[0]
+            header = {cell.value: cell.column for cell in worksheet[1] if cell.value is not None}
+            
+            for row_index, row_values in updates.items():
+                for column, value in row_values.items():
+                    if column not in header:
+                        header[column] = worksheet.max_column + 1
+                        worksheet.cell(row=1, column=header[column], value=column)
+                    cell = worksheet.cell(row=row_index + 2, column=header[column], value=value)
+                    if column in STATUS_DATE_COLUMNS:
+                        cell.number_format = 'dd/mm/yyyy'
+            
+            workbook.save(self.excel_file_path)
+            print("✅ Excel file updated in place")
+            
+        except Exception as e:
+            print(f"⚠️ Could not update workbook in place, rewriting with xlsxwriter: {str(e)}")
+            try:
+                if self.df is None:
+                    self.df = pd.read_excel(self.excel_file_path)
+                self.apply_status_updates(self.df, updates)
                 
+                with pd.ExcelWriter(self.excel_file_path, 
+                                   engine='xlsxwriter',
+                                   date_format='DD/MM/YYYY',
+                                   datetime_format='DD/MM/YYYY HH:MM:SS') as writer:
+                    
+                    self.df.to_excel(writer, sheet_name='Sheet1', index=False)
+                    
+                    workbook = writer.book
+                    worksheet = writer.sheets['Sheet1']
+                    date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+                    worksheet.set_column('I:J', 12, date_format)
+                    
                 print(f"✅ Updated Excel file with proper date formatting")
-                print(f"   Date of Last Action: {today.strftime('%d/%m/%Y')}")
-                print(f"   Next Action Due Date: {next_due_date.strftime('%d/%m/%Y')} (14 days from today)")
-                print(f"   Status: {status}")
-                print(f"   Success/Failed: {success_status}")
                 
+            except Exception as ex:
+                print(f"❌ Could not compact status journal, keeping it for next run: {str(ex)}")
+                return False
+        
+        self.status_journal.clear()
+        self._journal_pending = 0
+        return True
+
+    def print_contact_header(self, position, total, school_name, director_name, email, cc_emails,
+                             auto_select_schools, schedule_emails):
+        print(f"\n{'='*60}")
+        print(f"Processing {position}/{total}: {school_name}")
+        print(f"Director: {director_name}")
+        print(f"Email: {email}")
+        print(f"CC: {cc_emails}")
+        print(f"Auto-select: {'ON' if auto_select_schools else 'OFF'}")
+        print(f"Schedule send: {'ON' if schedule_emails else 'OFF'}")
+        print(f"Confirmation: {'REQUIRED' if self.require_confirmation else 'AUTO-SELECT'}")
+        print(f"Search limit: 15 conversations")
+        print('='*60)
+
+    def use_transport(self, schedule_emails):
+        """True if contacts go to the protocol transport before the browser
+
+        The transport picks the director's thread and sends on its own, so it is skipped while
+        require_confirmation asks for every selection to be confirmed.
+        """
+        if self.transport is None or self.require_confirmation:
+            return False
+        return self.transport.supports_schedule or not schedule_emails
+
+    def process_single_contact(self, contact, position, total, auto_select_schools=True, schedule_emails=True):
+        """Search, reply and schedule for one ContactRecord; returns (status, success_status)"""
+        school_name = contact.school_name
+        director_name = contact.last_name
+        email = contact.email
+        cc_emails = str(contact.cc)
+        
+        email_body = self.email_body_for(contact)
+        
+        # Store current director name for interactive checking
+        self.current_director_name = director_name
+        
+        self.print_contact_header(position, total, school_name, director_name, email, cc_emails,
+                                  auto_select_schools, schedule_emails)
+        
+        try:
+            # Protocol backend first; it cannot schedule or ask for confirmation, so those stay in the browser
+            if self.use_transport(schedule_emails):
+                thread = self.transport.find_thread(school_name, director_name)
+                if thread and self.transport.reply(thread, director_name, cc_emails,
+                                                   email_body, schedule_send=schedule_emails):
+                    print(f"✅ Follow-up sent for {school_name} via {self.transport.name}")
+                    return 'Follow-up Email Sent', 'Successful'
+                print(f"↩️ {self.transport.name} could not handle {school_name}, falling back to the browser")
+            
+            if not self.start_session():
+                return 'Login Failed', 'Failed'
+            
+            browser = self.browser_transport
+            thread = browser.find_thread(school_name, director_name, auto_select=auto_select_schools)
+            if thread:
+                send_at = self.send_time_for(contact) if schedule_emails else None
+                if browser.reply(thread, director_name, cc_emails, email_body, schedule_send=schedule_emails,
+                                 send_at=send_at):
+                    if schedule_emails:
+                        print(f"✅ Follow-up scheduled for {school_name}")
+                        return self.scheduled_status(send_at), 'Scheduled'
+                    print(f"✅ Follow-up processed for {school_name}")
+                    return 'Follow-up Email Sent', 'Successful'
+                print(f"❌ Could not process reply for {school_name}")
+                return 'Follow-up Failed', 'Failed'
+            print(f"⏭️ Skipped {school_name}")
+            return 'No Conversation Selected', 'Skipped'
         except Exception as e:
-            print(f"⚠️ Could not save with xlsxwriter, falling back to default method: {str(e)}")
-            self.df.loc[row_index, 'Date of Last Action'] = today.strftime('%d/%m/%Y')
-            self.df.loc[row_index, 'Next Action Due Date'] = next_due_date.strftime('%d/%m/%Y')
-            
-            self.df.to_excel(self.excel_file_path, index=False)
-            print(f"✅ Updated Excel file with status: {status}")
+            print(f"❌ Error processing {school_name}: {str(e)}")
+            return 'Processing Error', 'Failed'
+
+    def set_excel_file(self, excel_file_path):
+        """Point the bot at another sheet (used by the daemon between jobs)"""
+        self.status_journal.close()
+        self.checkpoint.close()
+        self.excel_file_path = excel_file_path
+        self.status_journal = StatusJournal(excel_file_path + '.journal.jsonl')
+        self.checkpoint = ContactCheckpoint(excel_file_path + '.checkpoint.jsonl')
+        self._row_contact_ids = {}
+        self._journal_pending = 0
+        self.df = None
+        self.contact_source = None
+        self.email_templates = None
+        self.rendered_bodies = {}
+        self._body_cache = None
+
+    def start_session(self):
+        """Reuse the open, logged-in browser if there is one, otherwise launch and log in"""
+        if self.driver is not None and self.ensure_valid_window_handle():
+            return True
+        self.close_driver()
+        self.setup_driver()
+        return self.ensure_gmail_session()
 
     def process_contacts(self, start_index=0, max_emails=None, auto_select_schools=True, schedule_emails=True):
-        """Process contacts from Excel file and send automated emails"""
+        """Process contacts from Excel file and send automated emails
+
+        Returns False if the sheet could not be loaded, login failed or the status updates could not
+        be written back (per-contact failures are recorded in the sheet, not here).
+        """
         if not self.load_excel_data():
-            return
-        self.setup_driver()
+            return False
         
-        # If manual login fails, return early
-        if not self.manual_login_gmail():
+        # Pull the first chunk so its bodies are rendered before the browser starts; later chunks
+        # are rendered as the stream reaches them
+        contacts = self.iter_prepared_contacts(start_index, max_emails)
+        upcoming = list(itertools.islice(contacts, 1))
+        
+        # If login fails, return early (the browser starts lazily when a protocol transport is set)
+        if not self.use_transport(schedule_emails) and not self.start_session():
             print("❌ Login failed, exiting...")
-            return
+            return False
             
-        contacts_to_process = self.df.copy()
-        if contacts_to_process.empty:
-            print("No contacts to process.")
-            return
         processed_count = 0
-        for idx, contact in contacts_to_process.iterrows():
-            if max_emails and processed_count >= max_emails:
-                break
-            if processed_count < start_index:
+        try:
+            # Rows are streamed, so processing starts before the whole sheet is parsed
+            for contact in itertools.chain(upcoming, contacts):
+                total = self.contact_source.total_rows or '?'
+                status, success_status = self.process_single_contact(
+                    contact, contact.row_index + 1, total,
+                    auto_select_schools=auto_select_schools, schedule_emails=schedule_emails)
+                self.update_excel_status(contact.row_index, status, success_status)
+                
                 processed_count += 1
-                continue
-            school_name = contact['School Name']
-            director_name = contact['Last Name']
-            email = contact['Email']
-            cc_emails = str(contact['CC']) if pd.notna(contact['CC']) else ""
-            
-            # Store current director name for interactive checking
-            self.current_director_name = director_name
-            
-            print(f"\n{'='*60}")
-            print(f"Processing {processed_count + 1}/{len(contacts_to_process)}: {school_name}")
-            print(f"Director: {director_name}")
-            print(f"Email: {email}")
-            print(f"CC: {cc_emails}")
-            print(f"Auto-select: {'ON' if auto_select_schools else 'OFF'}")
-            print(f"Schedule for 10 PM: {'ON' if schedule_emails else 'OFF'}")
-            print(f"Confirmation: {'REQUIRED' if self.require_confirmation else 'AUTO-SELECT'}")
-            print(f"Search limit: 15 conversations")
-            print('='*60)
-            
-            try:
-                if self.search_school_and_select(school_name, auto_select=auto_select_schools):
-                    if self.reply_to_message(director_name, cc_emails, schedule_send=schedule_emails):
-                        if schedule_emails:
-                            self.update_excel_status(idx, 'Follow-up Email Scheduled for 10 PM', 'Scheduled')
-                            print(f"✅ Follow-up scheduled for {school_name}")
-                        else:
-                            self.update_excel_status(idx, 'Follow-up Email Sent', 'Successful')
-                            print(f"✅ Follow-up processed for {school_name}")
-                    else:
-                        print(f"❌ Could not process reply for {school_name}")
-                        self.update_excel_status(idx, 'Follow-up Failed', 'Failed')
-                else:
-                    print(f"⏭️ Skipped {school_name}")
-                    self.update_excel_status(idx, 'No Conversation Selected', 'Skipped')
-            except Exception as e:
-                print(f"❌ Error processing {school_name}: {str(e)}")
-                self.update_excel_status(idx, 'Processing Error', 'Failed')
-            
-            processed_count += 1
-            
-            if processed_count < len(contacts_to_process):
-                print("Waiting 5 seconds before next email...")
-                time.sleep(5)
+                
+                if self.driver is not None:
+                    print("Waiting for the compose window to close before next email...")
+                    self.wait_for_compose_closed()
+        finally:
+            # Apply all journaled status updates in one batched pass
+            compacted = self.compact_status_journal()
+            self.selector_registry.save()
+            if self.thread_cache is not None:
+                self.thread_cache.save()
+            self.finish_checkpoint()
+            self.metrics.export()
         print(f"\n✅ Processed {processed_count} contacts")
         
         if schedule_emails:
             print("\n🎉 All emails have been scheduled using Gmail's native scheduling!")
-            print("📧 Gmail will automatically send them at 10:00 PM today.")
+            print("📧 Gmail will send them at their assigned times inside the send window.")
             print("📋 You can view/modify scheduled emails in Gmail's 'Scheduled' folder.")
+        return compacted
+
+    def reply_and_get_status(self, school_name, director_name, cc_emails, schedule_emails=True, email_body=None,
+                             timezone_name=None):
+        """Reply in the open conversation; returns (status, success_status) for the sheet"""
+        send_at = self.send_scheduler.next_slot(timezone_name) if schedule_emails else None
+        if self.reply_to_message(director_name, cc_emails, schedule_send=schedule_emails, email_body=email_body,
+                                 send_at=send_at):
+            print(f"✅ Follow-up processed for {school_name}")
+            if schedule_emails:
+                return self.scheduled_status(send_at), 'Scheduled'
+            return 'Follow-up Email Sent', 'Successful'
+        print(f"❌ Could not process reply for {school_name}")
+        return 'Follow-up Failed', 'Failed'
+
+    def plan_school_groups(self, contacts):
+        """Group contacts by normalized school name, keeping sheet order within and across groups"""
+        groups = {}
+        for contact in contacts:
+            key = re.sub(r'\s+', ' ', str(contact.school_name)).strip().lower()
+            groups.setdefault(key, []).append(contact)
+        return groups
+
+    def search_school_group(self, school_name):
+        """Run one search for a school group; returns its candidates, or None if the search could not run"""
+        if not self.ensure_valid_window_handle():
+            print("❌ No valid browser window")
+            return None
+        if not self.run_school_search(school_name):
+            return None
+        return self.find_school_candidates(school_name)
+
+    def process_contacts_grouped(self, start_index=0, max_emails=None, auto_select_schools=True, schedule_emails=True):
+        """Process contacts school by school, sharing one search and its candidates between directors"""
+        if not self.load_excel_data():
+            return False
+        # Bodies are rendered while planning, before the browser starts
+        groups = self.plan_school_groups(self.iter_prepared_contacts(start_index, max_emails))
+        if not self.start_session():
+            print("❌ Login failed, exiting...")
+            return False
+        
+        total = sum(len(group) for group in groups.values())
+        print(f"🏫 Planned {total} contacts across {len(groups)} schools")
+        
+        processed_count = 0
+        searches = 0
+        try:
+            for group in groups.values():
+                school_name = group[0].school_name
+                candidates = None
+                reusable = False
+                self.group_payloads = {}
+                
+                for contact in group:
+                    director_name = contact.last_name
+                    cc_emails = str(contact.cc)
+                    self.current_director_name = director_name
+                    self.print_contact_header(processed_count + 1, total, school_name, director_name,
+                                              contact.email, cc_emails, auto_select_schools, schedule_emails)
+                    try:
+                        selected = self.open_cached_thread(school_name, director_name)
+                        if not selected:
+                            if not reusable:
+                                candidates = self.search_school_group(school_name)
+                                searches += 1
+                            else:
+                                print(f"♻️ Reusing the {len(candidates)} conversations found for {school_name}")
+                            
+                            if candidates is None:
+                                selected = self.manual_fallback("Please search for the school manually and select the conversation, then press Enter...")
+                            elif not candidates:
+                                selected = self.manual_fallback("Please manually select a conversation if one exists, then press Enter...")
+                            else:
+                                selected = self.select_conversation(
+                                    [dict(candidate) for candidate in candidates], school_name, director_name,
+                                    auto_select=auto_select_schools)
+                            # Rows without a thread id hold elements that go stale once a thread is opened
+                            reusable = candidates is not None and all(c.get('thread_id') for c in candidates)
+                        
+                        if not selected:
+                            print(f"⏭️ Skipped {school_name}")
+                            status, success_status = 'No Conversation Selected', 'Skipped'
+                        else:
+                            status, success_status = self.reply_and_get_status(
+                                school_name, director_name, cc_emails, schedule_emails,
+                                email_body=self.email_body_for(contact),
+                                timezone_name=contact.fields.get(normalize_column(self.timezone_column)))
+                    except Exception as e:
+                        print(f"❌ Error processing {school_name}: {str(e)}")
+                        status, success_status = 'Processing Error', 'Failed'
+                        reusable = False
+                    
+                    self.update_excel_status(contact.row_index, status, success_status)
+                    processed_count += 1
+                    self.wait_for_compose_closed()
+        finally:
+            self.group_payloads = None
+            compacted = self.compact_status_journal()
+            self.selector_registry.save()
+            if self.thread_cache is not None:
+                self.thread_cache.save()
+            self.finish_checkpoint()
+            self.metrics.export()
+        
+        print(f"\n✅ Processed {processed_count} contacts with {searches} searches across {len(groups)} schools")
+        return compacted
+
+    def make_contact_job(self, contact):
+        """Per-contact state for pipelined processing (kept per job, not on the instance)"""
+        return {
+            'idx': contact.row_index,
+            'school_name': contact.school_name,
+            'director_name': contact.last_name,
+            'email': contact.email,
+            'cc_emails': str(contact.cc),
+            'body': self.email_body_for(contact),
+            'timezone': contact.fields.get(normalize_column(self.timezone_column)),
+            'tab': None,
+            'cached': None,  # Thread index entry being prefetched, if any
+            'previous_view': None
+        }
+
+    def prefetch_search(self, job, tab):
+        """Start loading a job's search results (or cached thread) in a tab without waiting for it"""
+        current_tab = self.driver.current_window_handle
+        entry = self.thread_cache.get(job['school_name'], job['director_name']) if self.thread_cache is not None else None
+        url = entry['url'] if entry else self.build_search_url(job['school_name'])
+        
+        self.driver.switch_to.window(tab)
+        # This tab may still show an earlier contact's thread; remember it so it is not mistaken for this one
+        previous = self.current_conversation_marker() if entry else None
+        self.driver.execute_script("window.location.href = arguments[0];", url)
+        self.driver.switch_to.window(current_tab)
+        
+        job['tab'] = tab
+        job['cached'] = entry
+        job['previous_view'] = previous
+        print(f"⏩ Prefetching {'cached thread' if entry else 'search'} for {job['school_name']}")
+
+    def process_contacts_pipelined(self, start_index=0, max_emails=None, auto_select_schools=True, schedule_emails=True):
+        """Process contacts while the next contact's search loads in a second tab"""
+        if not self.load_excel_data():
+            return False
+        
+        # Bodies are rendered here, before the browser starts
+        jobs = [self.make_contact_job(contact) for contact in self.iter_prepared_contacts(start_index, max_emails)]
+        if not jobs:
+            print("No contacts to process.")
+            return True
+        if not self.start_session():
+            print("❌ Login failed, exiting...")
+            return False
+        
+        foreground_tab = self.driver.current_window_handle
+        self.driver.switch_to.new_window('tab')
+        tabs = [foreground_tab, self.driver.current_window_handle]
+        self.driver.switch_to.window(foreground_tab)
+        
+        processed_count = 0
+        try:
+            for position, job in enumerate(jobs):
+                if job['tab'] is None:
+                    self.prefetch_search(job, tabs[position % 2])
+                self.driver.switch_to.window(job['tab'])
+                self.print_contact_header(position + 1, len(jobs), job['school_name'], job['director_name'],
+                                          job['email'], job['cc_emails'], auto_select_schools, schedule_emails)
+                
+                try:
+                    selected = False
+                    if job['cached']:
+                        selected = bool(self.wait_for_cached_thread(job['cached'], job['previous_view']))
+                        if selected:
+                            print("✅ Cached thread loaded - skipping search")
+                        else:
+                            self.thread_cache.invalidate(job['school_name'], job['director_name'])
+                    if not selected:
+                        selected = self.search_school_and_select(
+                            job['school_name'], auto_select=auto_select_schools,
+                            director_last_name=job['director_name'], prefetched=not job['cached'])
+                    
+                    # Next contact's search loads in the other tab while this reply is composed
+                    if position + 1 < len(jobs):
+                        self.prefetch_search(jobs[position + 1], tabs[(position + 1) % 2])
+                    
+                    if not selected:
+                        print(f"⏭️ Skipped {job['school_name']}")
+                        status, success_status = 'No Conversation Selected', 'Skipped'
+                    else:
+                        status, success_status = self.reply_and_get_status(
+                            job['school_name'], job['director_name'], job['cc_emails'], schedule_emails,
+                            email_body=job['body'], timezone_name=job['timezone'])
+                except Exception as e:
+                    print(f"❌ Error processing {job['school_name']}: {str(e)}")
+                    status, success_status = 'Processing Error', 'Failed'
+                
+                self.update_excel_status(job['idx'], status, success_status)
+                processed_count += 1
+                self.wait_for_compose_closed()
+        finally:
+            compacted = self.compact_status_journal()
+            self.selector_registry.save()
+            if self.thread_cache is not None:
+                self.thread_cache.save()
+            self.finish_checkpoint()
+            self.metrics.export()
+        
+        print(f"\n✅ Processed {processed_count} contacts (pipelined)")
+        return compacted
+
+    def clone_profile(self, worker_id):
+        """Copy the logged-in Chrome profile so a worker browser can reuse the session"""
+        worker_profile = f"{os.path.abspath(self.profile_dir)}_worker{worker_id}"
+        if os.path.exists(worker_profile):
+            shutil.rmtree(worker_profile, ignore_errors=True)
+        shutil.copytree(self.profile_dir, worker_profile,
+                        ignore=shutil.ignore_patterns('Singleton*', 'lockfile', '*.lock'))
+        return worker_profile
+
+    def run_parallel_worker(self, worker_id, shard, worker_profile, gmail_url, results,
+                            auto_select_schools=True, schedule_emails=True):
+        """Process one shard of contacts in its own browser and report outcomes to the writer queue"""
+        worker = GmailAutomationWithExcel(self.excel_file_path, headless=self.headless, profile_dir=worker_profile)
+        worker.require_confirmation = False
+        worker.unattended = True
+        worker.wait_timeouts = dict(self.wait_timeouts)
+        worker.settle_window = self.settle_window
+        worker.thread_cache = self.thread_cache
+        worker.selector_registry = self.selector_registry
+        worker.metrics = self.metrics
+        worker.rendered_bodies = self.rendered_bodies
+        worker.send_scheduler = self.send_scheduler
+        reported = set()
+        try:
+            worker.setup_driver()
+            worker.driver.get(gmail_url)
+            if not worker.verify_gmail_loaded():
+                print(f"❌ Worker {worker_id}: cloned session is not logged in")
+                return
+            
+            for position, contact in enumerate(shard, start=1):
+                status, success_status = worker.process_single_contact(
+                    contact, position, len(shard),
+                    auto_select_schools=auto_select_schools, schedule_emails=schedule_emails)
+                results.put((contact.row_index, status, success_status))
+                reported.add(contact.row_index)
+                worker.wait_for_compose_closed()
+        except Exception as e:
+            print(f"❌ Worker {worker_id} stopped: {str(e)}")
+        finally:
+            for contact in shard:
+                if contact.row_index not in reported:
+                    results.put((contact.row_index, 'Worker Error', 'Failed'))
+            worker.close_driver()
+            results.put(None)
+
+    def process_contacts_parallel(self, num_workers=4, start_index=0, max_emails=None,
+                                  auto_select_schools=True, schedule_emails=True):
+        """Shard contacts across several browsers that share one Gmail login"""
+        if not self.load_excel_data():
+            return False
+        
+        # Bodies are rendered here, before the login browser starts
+        contacts_to_process = list(self.iter_prepared_contacts(start_index, max_emails))
+        if not contacts_to_process:
+            print("No contacts to process.")
+            return True
+        
+        if not self.profile_dir:
+            self.profile_dir = os.path.abspath(DEFAULT_PROFILE_DIR)
+        self.setup_driver()
+        
+        if not self.ensure_gmail_session():
+            print("❌ Login failed, exiting...")
+            return False
+        gmail_url = self.get_current_gmail_url()
+        
+        # Close the login browser so its profile can be copied without locks
+        self.close_driver()
+        
+        num_workers = max(1, min(num_workers, len(contacts_to_process)))
+        shards = [contacts_to_process[i::num_workers] for i in range(num_workers)]
+        
+        print(f"\n🚀 Starting {num_workers} worker browsers for {len(contacts_to_process)} contacts")
+        results = queue.Queue()
+        workers = []
+        for worker_id, shard in enumerate(shards):
+            worker_profile = self.clone_profile(worker_id)
+            thread = threading.Thread(
+                target=self.run_parallel_worker,
+                args=(worker_id, shard, worker_profile, gmail_url, results, auto_select_schools, schedule_emails),
+                daemon=True)
+            thread.start()
+            workers.append(thread)
+        
+        # Single writer: only this thread touches the DataFrame and the status journal
+        processed_count = 0
+        finished_workers = 0
+        try:
+            while finished_workers < len(workers):
+                result = results.get()
+                if result is None:
+                    finished_workers += 1
+                    continue
+                idx, status, success_status = result
+                self.update_excel_status(idx, status, success_status)
+                processed_count += 1
+        finally:
+            compacted = self.compact_status_journal()
+            self.selector_registry.save()
+            if self.thread_cache is not None:
+                self.thread_cache.save()
+            self.finish_checkpoint()
+            self.metrics.export()
+        
+        print(f"\n✅ Processed {processed_count} contacts across {num_workers} workers")
+        return compacted
 
     def close_driver(self):
         if self.driver:
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+class DaemonChannel:
+    """Line-delimited JSON channel to a CLI client; doubles as stdout and input() for a job"""
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+        self._partial = ""
+
+    def send(self, message):
+        self.wfile.write((json.dumps(message) + "\n").encode('utf-8'))
+        self.wfile.flush()
+
+    def receive(self):
+        line = self.rfile.readline()
+        if not line:
+            raise EOFError("Client disconnected")
+        return json.loads(line.decode('utf-8'))
+
+    def write(self, text):
+        self._partial += text
+        while "\n" in self._partial:
+            line, self._partial = self._partial.split("\n", 1)
+            self.send({'type': 'log', 'text': line})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def ask(self, prompt):
+        self.send({'type': 'prompt', 'text': self._partial + prompt})
+        self._partial = ""
+        return self.receive().get('text', '')
+
+def daemon_token_path(profile_dir=None):
+    return os.path.join(os.path.abspath(profile_dir or DEFAULT_PROFILE_DIR), DAEMON_TOKEN_FILE_NAME)
+
+class AutomationDaemon:
+    """Keeps one warm, logged-in browser and runs sheet jobs submitted over a local socket"""
+    def __init__(self, bot, port=DAEMON_PORT, keepalive_seconds=600):
+        self.bot = bot
+        self.port = port
+        self.keepalive_seconds = keepalive_seconds
+        self.token_path = daemon_token_path(bot.profile_dir)
+        self.token = None
+
+    def issue_token(self):
+        """Write a fresh client token readable only by this user; jobs must present it"""
+        os.makedirs(os.path.dirname(self.token_path), exist_ok=True)
+        self.token = secrets.token_hex(32)
+        fd = os.open(self.token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.token)
+        os.chmod(self.token_path, 0o600)  # O_CREAT keeps the mode of an existing file
+
+    def is_authorized(self, job):
+        token = job.get('token') if isinstance(job, dict) else None
+        return bool(self.token) and isinstance(token, str) and hmac.compare_digest(
+            token.encode('utf-8'), self.token.encode('utf-8'))
+
+    def run_job(self, job, channel):
+        """Run one submitted job, streaming its output back through the channel"""
+        bot = self.bot
+        bot.set_excel_file(os.path.abspath(job['sheet']))
+        bot.require_confirmation = bool(job.get('confirm', False))
+        bot.resume = bool(job.get('resume', False))
+        bot.input_func = channel.ask
+        try:
+            with contextlib.redirect_stdout(channel):
+                print(f"📥 Job received: {job['sheet']}")
+                return bool(bot.process_contacts(
+                    start_index=job.get('start_index', 0),
+                    max_emails=job.get('max_emails'),
+                    auto_select_schools=True,
+                    schedule_emails=bool(job.get('schedule', True))))
+        finally:
+            bot.input_func = input
+
+    def serve_forever(self):
+        daemon = self
+        
+        class JobHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                channel = DaemonChannel(self.rfile, self.wfile)
+                try:
+                    job = channel.receive()
+                    if not daemon.is_authorized(job):
+                        # Nothing is run or streamed for a client that cannot read the profile's token
+                        print("⚠️ Rejected a job without a valid daemon token")
+                        channel.send({'type': 'done', 'ok': False, 'error': 'Invalid daemon token'})
+                        return
+                    ok = daemon.run_job(job, channel)
+                    channel.send({'type': 'done', 'ok': ok})
+                except Exception as e:
+                    print(f"❌ Job failed: {str(e)}")
+                    try:
+                        channel.send({'type': 'done', 'ok': False, 'error': str(e)})
+                    except Exception:
+                        pass
+        
+        class JobServer(socketserver.TCPServer):
+            allow_reuse_address = True
+        
+        if not self.bot.start_session():
+            print("❌ Could not start a logged-in browser, daemon not started")
+            return
+        
+        self.issue_token()
+        try:
+            # Single-threaded server: jobs share one browser, so they run one at a time
+            with JobServer(('127.0.0.1', self.port), JobHandler) as server:
+                server.timeout = self.keepalive_seconds
+                print(f"🟢 Automation daemon listening on 127.0.0.1:{self.port} (token: {self.token_path})")
+                while True:
+                    server.handle_request()
+                    # Keep the browser warm between jobs and relaunch it if it died
+                    if not self.bot.start_session():
+                        print("⚠️ Browser session lost and could not be restored")
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(self.token_path)
+
+def submit_job(job, port=DAEMON_PORT, profile_dir=None):
+    """Send a job to the running daemon and stream its progress to this terminal"""
+    token_path = daemon_token_path(profile_dir)
+    try:
+        with open(token_path, 'r', encoding='utf-8') as f:
+            job = dict(job, token=f.read().strip())
+    except OSError:
+        print(f"❌ No daemon token at {token_path} - is the daemon running with this --profile-dir?")
+        return False
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        reader = sock.makefile('r', encoding='utf-8')
+        writer = sock.makefile('w', encoding='utf-8')
+        writer.write(json.dumps(job) + "\n")
+        writer.flush()
+        for line in reader:
+            message = json.loads(line)
+            if message['type'] == 'log':
+                print(message['text'])
+            elif message['type'] == 'prompt':
+                writer.write(json.dumps({'type': 'answer', 'text': input(message['text'])}) + "\n")
+                writer.flush()
+            elif message['type'] == 'done':
+                if message.get('error'):
+                    print(f"❌ Job failed: {message['error']}")
+                return message.get('ok', False)
+    print("❌ Daemon closed the connection before the job finished")
+    return False
+
+def run_cli(argv):
+    """Non-interactive entry points: run a sheet directly, start the daemon, or submit a job to it"""
+    parser = argparse.ArgumentParser(description="Gmail follow-up automation")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = subparsers.add_parser('run', help="Process a sheet in this process")
+    daemon_parser = subparsers.add_parser('daemon', help="Start a resident daemon with a warm browser")
+    submit_parser = subparsers.add_parser('submit', help="Submit a sheet to the running daemon")
+    
+    for sub in (run_parser, daemon_parser):
+        sub.add_argument('--headless', action='store_true', help="Run Chrome headless")
+        sub.add_argument('--profile-dir', default=None, help="Persistent Chrome profile directory")
+        sub.add_argument('--send-window', default='22:00-06:00', help="Local HH:MM-HH:MM window for scheduled sends")
+        sub.add_argument('--send-rate', type=float, default=60, help="Scheduled sends per hour")
+        sub.add_argument('--send-burst', type=int, default=1, help="Sends allowed at the same minute")
+        sub.add_argument('--transport', choices=['browser', 'imap'], default='browser',
+                         help="Try IMAP/SMTP (GMAIL_USER, GMAIL_APP_PASSWORD) before the browser for immediate sends")
+        sub.add_argument('--imap-host', default=None, help="IMAP server (default GMAIL_IMAP_HOST or imap.gmail.com)")
+        sub.add_argument('--imap-port', type=int, default=None, help="IMAP port (default GMAIL_IMAP_PORT or 993)")
+        sub.add_argument('--smtp-host', default=None, help="SMTP server (default GMAIL_SMTP_HOST or smtp.gmail.com)")
+        sub.add_argument('--smtp-port', type=int, default=None, help="SMTP port (default GMAIL_SMTP_PORT or 587)")
+        sub.add_argument('--no-ssl', dest='use_ssl', action='store_false', default=None,
+                         help="Plain IMAP/SMTP without TLS, for a local stand-in server")
+    for sub in (run_parser, submit_parser):
+        sub.add_argument('sheet', help="Path to the contacts workbook")
+        sub.add_argument('--immediate', action='store_true', help="Send immediately instead of scheduling")
+        sub.add_argument('--confirm', action='store_true', help="Ask before selecting a matching conversation")
+        sub.add_argument('--start-index', type=int, default=0)
+        sub.add_argument('--max-emails', type=int, default=None)
+        sub.add_argument('--resume', action='store_true',
+                         help="Continue an interrupted run, skipping contacts its checkpoint marks complete")
+    for sub in (daemon_parser, submit_parser):
+        sub.add_argument('--port', type=int, default=DAEMON_PORT)
+    submit_parser.add_argument('--profile-dir', default=None,
+                               help="The daemon's Chrome profile directory (holds its access token)")
+    run_parser.add_argument('--workers', type=int, default=1, help="Number of parallel worker browsers")
+    run_parser.add_argument('--pipeline', action='store_true',
+                            help="Prefetch the next contact's search in a second tab while replying")
+    run_parser.add_argument('--group-by-school', action='store_true',
+                            help="Search each school once and resolve all of its directors against the results")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'submit':
+        ok = submit_job({
+            'type': 'job',
+            'sheet': os.path.abspath(args.sheet),
+            'schedule': not args.immediate,
+            'confirm': args.confirm,
+            'start_index': args.start_index,
+            'max_emails': args.max_emails,
+            'resume': args.resume
+        }, port=args.port, profile_dir=args.profile_dir)
+        return 0 if ok else 1
+    
+    transport = None
+    if args.transport == 'imap':
+        transport = ImapSmtpTransport.from_env(imap_host=args.imap_host, imap_port=args.imap_port,
+                                               smtp_host=args.smtp_host, smtp_port=args.smtp_port,
+                                               use_ssl=args.use_ssl)
+        if transport is None:
+            print("❌ Set GMAIL_USER and GMAIL_APP_PASSWORD to use the IMAP/SMTP transport")
+            return 1
+    
+    if args.command == 'daemon':
+        gmail_bot = GmailAutomationWithExcel(
+            "Main_Filtered_Schools_Formatted.xlsx", headless=args.headless, profile_dir=args.profile_dir)
+        gmail_bot.transport = transport
+        gmail_bot.send_scheduler = SendWindowScheduler.from_spec(args.send_window, args.send_rate, args.send_burst)
+        try:
+            AutomationDaemon(gmail_bot, port=args.port).serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Daemon stopped")
+        finally:
+            gmail_bot.close_driver()
+            if transport is not None:
+                transport.close()
+        return 0
+    
+    gmail_bot = GmailAutomationWithExcel(args.sheet, headless=args.headless, profile_dir=args.profile_dir)
+    gmail_bot.transport = transport
+    gmail_bot.send_scheduler = SendWindowScheduler.from_spec(args.send_window, args.send_rate, args.send_burst)
+    gmail_bot.require_confirmation = args.confirm
+    gmail_bot.resume = args.resume
+    try:
+        if args.workers > 1:
+            ok = gmail_bot.process_contacts_parallel(
+                num_workers=args.workers,
+                start_index=args.start_index,
+                max_emails=args.max_emails,
+                schedule_emails=not args.immediate)
+        elif args.pipeline:
+            ok = gmail_bot.process_contacts_pipelined(
+                start_index=args.start_index,
+                max_emails=args.max_emails,
+                schedule_emails=not args.immediate)
+        elif args.group_by_school:
+            ok = gmail_bot.process_contacts_grouped(
+                start_index=args.start_index,
+                max_emails=args.max_emails,
+                schedule_emails=not args.immediate)
+        else:
+            ok = gmail_bot.process_contacts(
+                start_index=args.start_index,
+                max_emails=args.max_emails,
+                schedule_emails=not args.immediate)
+    finally:
+        gmail_bot.close_driver()
+        if transport is not None:
+            transport.close()
+    return 0 if ok else 1
 
 def main():
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    
     EXCEL_FILE_PATH = "Main_Filtered_Schools_Formatted.xlsx"
     gmail_bot = GmailAutomationWithExcel(EXCEL_FILE_PATH, headless=False)
     try:
@@ -1265,23 +3732,40 @@ def main():
             else:
                 print("Please enter 'y' for manual confirmation or 'n' for auto-select")
         
-        schedule_choice = input("\nSchedule emails for 10:00 PM today using Gmail's Schedule Send? (y/n): ").lower()
+        schedule_choice = input("\nSchedule emails across tonight's send window using Gmail's Schedule Send? (y/n): ").lower()
         schedule_emails = schedule_choice in ['y', 'yes']
         
+        if gmail_bot.checkpoint.recorded():
+            resume_choice = input(f"\nResume the interrupted run ({gmail_bot.checkpoint.recorded()} contacts already recorded)? (y/n): ").lower()
+            gmail_bot.resume = resume_choice in ['y', 'yes']
+        
+        workers_choice = input("\nNumber of parallel worker browsers (Enter = 1): ").strip()
+        num_workers = int(workers_choice) if workers_choice.isdigit() and int(workers_choice) > 0 else 1
+        
         print(f"\n🎯 AUTOMATION SETTINGS:")
-        print(f"   📧 Scheduling: {'10:00 PM Today' if schedule_emails else 'Send Immediately'}")
+        print(f"   📧 Scheduling: {'Spread over the send window' if schedule_emails else 'Send Immediately'}")
         print(f"   🤖 Auto-select: ON")
         print(f"   ✅ Confirmation: {'MANUAL' if gmail_bot.require_confirmation else 'AUTO'}")
         print(f"   🔢 Search limit: 15 conversations (increased from 5)")
         print(f"   🎨 Font: Arial 11px")
+        print(f"   🧵 Workers: {num_workers}{' (workers always auto-select)' if num_workers > 1 else ''}")
         print("-" * 60)
         
-        gmail_bot.process_contacts(
-            start_index=0, 
-            max_emails=None, 
-            auto_select_schools=True,
-            schedule_emails=schedule_emails
-        )
+        if num_workers > 1:
+            gmail_bot.process_contacts_parallel(
+                num_workers=num_workers,
+                start_index=0,
+                max_emails=None,
+                auto_select_schools=True,
+                schedule_emails=schedule_emails
+            )
+        else:
+            gmail_bot.process_contacts(
+                start_index=0, 
+                max_emails=None, 
+                auto_select_schools=True,
+                schedule_emails=schedule_emails
+            )
         
         input("Press Enter to close the browser...")
             